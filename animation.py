@@ -0,0 +1,51 @@
+import pygame
+
+from profiler import counters
+from resources import assets, convert_alpha
+
+# Clips already loaded, shared by every sprite that plays them
+clip_cache = {}
+
+# Alpha of the dash ghost copies
+GHOST_ALPHA = 100
+
+class AnimationClip:
+    # The frames of one animation, each loaded, padded onto a fixed size canvas and
+    # converted once, plus a mirrored copy of every frame for facing left. Sprites get
+    # frames by reference, nothing is allocated while an animation plays.
+    def __init__(self, paths, size):
+        self.right = []
+        for path in paths:
+            frame = pygame.Surface(size, pygame.SRCALPHA)
+            frame.blit(assets.image(path), (0, 0))
+            self.right.append(convert_alpha(frame))
+        self.left = [pygame.transform.flip(frame, True, False) for frame in self.right]
+        counters['surfaces'] += 2 * len(paths)
+        self.ghost_right = None
+        self.ghost_left = None
+
+    def __len__(self):
+        return len(self.right)
+
+    def frame(self, index, facing_right=True):
+        return self.right[index] if facing_right else self.left[index]
+
+    def ghost_frame(self, index, facing_right=True):
+        # Translucent copies for the dash trail, made the first time a ghost is needed
+        if self.ghost_right is None:
+            self.ghost_right = [self.ghost(frame) for frame in self.right]
+            self.ghost_left = [self.ghost(frame) for frame in self.left]
+        return self.ghost_right[index] if facing_right else self.ghost_left[index]
+
+    def ghost(self, frame):
+        ghost_image = frame.copy()
+        counters['surfaces'] += 1
+        ghost_image.set_alpha(GHOST_ALPHA)
+        return ghost_image
+
+def load_clip(paths, size):
+    key = (tuple(paths), size)
+    clip = clip_cache.get(key)
+    if clip is None:
+        clip = clip_cache[key] = AnimationClip(paths, size)
+    return clip
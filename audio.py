@@ -0,0 +1,85 @@
+import os
+
+import pygame
+
+from resources import assets
+
+# Mixer channels reserved for each category of sound. A category only ever plays on its
+# own channels, so a burst of shots can't cut off jumps or hits.
+SOUND_CATEGORIES = {'movement': 2, 'weapon': 3, 'impact': 2}
+SOUND_CATEGORY = {'jump': 'movement', 'dash': 'movement', 'shoot': 'weapon', 'hit': 'impact'}
+DEFAULT_CATEGORY = 'impact'
+
+# The same sound asked for again within this many ms is dropped
+THROTTLE_MS = 60
+
+class ChannelPool:
+    # Fixed set of reserved channels. A sound goes to a free channel, or takes the one
+    # that started playing longest ago when all are busy (a voice steal).
+    def __init__(self, channels):
+        self.channels = channels
+        self.started = [0] * len(channels)
+        self.plays = 0
+        self.throttled = 0
+        self.steals = 0
+
+    def play(self, sound, now):
+        self.plays += 1
+        if not self.channels:
+            return
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                break
+        else:
+            i = min(range(len(self.channels)), key=self.started.__getitem__)
+            self.steals += 1
+        self.channels[i].play(sound)
+        self.started[i] = now
+
+class AudioManager:
+    # Every sound effect loaded once by preload(), played by name through the channel
+    # pool of its category. Times are the caller's clock (World.get_ticks() in the game),
+    # without a mixer (headless runs) nothing is played but the bookkeeping still runs.
+    def __init__(self, categories=SOUND_CATEGORIES, throttle=THROTTLE_MS):
+        self.categories = categories
+        self.throttle = throttle
+        self.sounds = {}
+        self.pools = {}
+        self.last_played = {}
+
+    def preload(self, root='assets/sfx'):
+        for name in sorted(os.listdir(root)):
+            if name.endswith('.wav'):
+                self.sounds[name[:-4]] = assets.sound(os.path.join(root, name).replace(os.sep, '/'))
+        self.reserve()
+
+    def reserve(self):
+        # Reserved channels are never picked by Sound.play(), only through the pools
+        self.pools = {}
+        if pygame.mixer.get_init() is None:
+            self.pools = {category: ChannelPool([]) for category in self.categories}
+            return
+        total = sum(self.categories.values())
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), total))
+        pygame.mixer.set_reserved(total)
+        first = 0
+        for category, count in self.categories.items():
+            self.pools[category] = ChannelPool([pygame.mixer.Channel(i) for i in range(first, first + count)])
+            first += count
+
+    def play(self, name, now):
+        pool = self.pools[SOUND_CATEGORY.get(name, DEFAULT_CATEGORY)]
+        last = self.last_played.get(name)
+        # A clock that went back (a restored snapshot) never throttles
+        if last is not None and 0 <= now - last < self.throttle:
+            pool.throttled += 1
+            return
+        self.last_played[name] = now
+        pool.play(self.sounds[name], now)
+
+    def report(self):
+        return "audio: " + ", ".join(f"{category} {pool.plays} played, {pool.throttled} throttled, "
+                                     f"{pool.steals} stolen" for category, pool in self.pools.items())
+
+# Shared by the whole game
+audio = AudioManager()
@@ -0,0 +1,179 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, without it BatchGroup is a plain Group
+    np = None
+
+# Below this many sprites the per-call NumPy overhead costs more than it saves
+BATCH_MIN = 64
+
+class BatchGroup(pygame.sprite.Group):
+    # A sprite group that keeps positions, sizes, velocities and gravity of its sprites
+    # in NumPy arrays (one row per sprite) and moves them all with a few whole-array
+    # operations, instead of calling update() on every sprite. Rects are written back
+    # once per update so drawing and other code can keep reading sprite.rect.
+    #
+    # Sprites give their starting velocity through velocity() -> (vx, vy) and may have a
+    # gravity attribute. cull is a rect, sprites entirely outside it are killed; sprites
+    # that run into a sprite of solid (a collision.SpatialGroup) anywhere along their move
+    # are killed.
+    # Small groups and runs without NumPy fall back to calling each sprite's own update().
+    def __init__(self, *sprites, cull=None, solid=None):
+        self.cull = cull
+        self.solid = solid
+        self.rows = []
+        self.row_of = {}
+        self.stale = False  # Rows are behind the rects after a per-sprite update
+        if np is not None:
+            self.x = np.zeros(0)
+            self.y = np.zeros(0)
+            self.w = np.zeros(0)
+            self.h = np.zeros(0)
+            self.vx = np.zeros(0)
+            self.vy = np.zeros(0)
+            self.gravity = np.zeros(0)
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if np is None:
+            return
+        row = len(self.rows)
+        if row == len(self.x):
+            self.grow(max(16, row * 2))
+        self.rows.append(sprite)
+        self.row_of[sprite] = row
+        rect = sprite.rect
+        self.x[row], self.y[row], self.w[row], self.h[row] = rect.x, rect.y, rect.width, rect.height
+        self.vx[row], self.vy[row] = sprite.velocity()
+        self.gravity[row] = getattr(sprite, 'gravity', 0)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if np is None:
+            return
+        # Move the last row into the hole so live rows stay packed at the front
+        row = self.row_of.pop(sprite)
+        last = len(self.rows) - 1
+        if row != last:
+            moved = self.rows[last]
+            self.rows[row] = moved
+            self.row_of[moved] = row
+            for array in (self.x, self.y, self.w, self.h, self.vx, self.vy, self.gravity):
+                array[row] = array[last]
+        self.rows.pop()
+
+    def grow(self, capacity):
+        for name in ('x', 'y', 'w', 'h', 'vx', 'vy', 'gravity'):
+            array = np.zeros(capacity)
+            old = getattr(self, name)
+            array[:len(old)] = old
+            setattr(self, name, array)
+
+    def reload(self):
+        for row, sprite in enumerate(self.rows):
+            self.x[row], self.y[row] = sprite.rect.x, sprite.rect.y
+            self.vx[row], self.vy[row] = sprite.velocity()
+        self.stale = False
+
+    def update(self, *args, **kwargs):
+        n = len(self.rows)
+        if np is None or n < BATCH_MIN:
+            self.stale = True
+            if self.solid is None:
+                return super().update(*args, **kwargs)
+            for sprite in self.sprites():
+                start = sprite.rect.copy()
+                sprite.update(*args, **kwargs)
+                if sprite.alive():
+                    dx, dy = sprite.rect.x - start.x, sprite.rect.y - start.y
+                    if self.solid.sweep(start, dx, dy) is not None:
+                        sprite.kill()
+            return
+        if self.stale:
+            self.reload()
+
+        x, y, w, h = self.x[:n], self.y[:n], self.w[:n], self.h[:n]
+        vx, vy, gravity = self.vx[:n], self.vy[:n], self.gravity[:n]
+
+        # Same as calc_gravity(): start falling at 1px, then accelerate
+        falling = gravity != 0
+        vy[falling] = np.where(vy[falling] == 0, 1, vy[falling] + gravity[falling])
+
+        start_x, start_y = x.copy(), y.copy()
+
+        # Rects round half away from zero when a float is added to them
+        x[:] = round_rect(x + vx)
+        y[:] = round_rect(y + vy)
+
+        dead = []
+        if self.cull is not None:
+            view = self.cull
+            outside = (x + w < view.left) | (x > view.right) | (y + h < view.top) | (y > view.bottom)
+            dead = [self.rows[row] for row in np.flatnonzero(outside)]
+        if self.solid is not None:
+            hit = self.sweep(start_x, start_y, x - start_x, y - start_y, w, h)
+            if self.cull is not None:
+                hit &= ~outside
+            dead.extend(self.rows[row] for row in np.flatnonzero(hit))
+
+        for sprite, sx, sy in zip(self.rows, x.astype(int).tolist(), y.astype(int).tolist()):
+            sprite.rect.x = sx
+            sprite.rect.y = sy
+        for sprite in dead:
+            sprite.kill()
+
+    def sweep(self, x, y, dx, dy, w, h):
+        # Which rows run into a solid sprite on the way, same rule as
+        # collision.time_of_impact() with every row against every solid sprite the moves
+        # could reach, found with one broadphase query over all of them
+        left, top = min(x.min(), (x + dx).min()), min(y.min(), (y + dy).min())
+        right, bottom = max((x + w).max(), (x + dx + w).max()), max((y + h).max(), (y + dy + h).max())
+        solids = list(self.solid.candidates(pygame.Rect(left, top, right - left, bottom - top)))
+        if not solids:
+            return np.zeros(len(x), dtype=bool)
+        self.solid.tests += len(x) * len(solids)
+
+        boxes = np.array([(s.rect.x, s.rect.y, s.rect.width, s.rect.height) for s in solids], dtype=float)
+        enter_x, leave_x = axis_times(x, w, dx, boxes[:, 0], boxes[:, 2])
+        enter_y, leave_y = axis_times(y, h, dy, boxes[:, 1], boxes[:, 3])
+        enter = np.maximum(enter_x, enter_y)
+        leave = np.minimum(leave_x, leave_y)
+        hit = (enter < leave) & (enter < 1) & (leave > 0) & ((enter >= 0) | (leave > 1))
+        return hit.any(axis=1)
+
+    def collide_group(self, targets):
+        # (sprite, target) pairs whose rects overlap, tested all against all at once
+        targets = targets.sprites()
+        if not targets or not self:
+            return []
+        if np is None or self.stale:
+            return [(sprite, target) for sprite in self.sprites() for target in targets
+                    if sprite.rect.colliderect(target.rect)]
+
+        n = len(self.rows)
+        boxes = np.array([(t.rect.x, t.rect.y, t.rect.width, t.rect.height) for t in targets], dtype=float)
+        tx, ty, tw, th = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        x, y = self.x[:n, None], self.y[:n, None]
+        w, h = self.w[:n, None], self.h[:n, None]
+        overlap = (x < tx + tw) & (x + w > tx) & (y < ty + th) & (y + h > ty)
+        rows, columns = np.nonzero(overlap)
+        return [(self.rows[row], targets[column]) for row, column in zip(rows.tolist(), columns.tolist())]
+
+def round_rect(values):
+    return np.sign(values) * np.floor(np.abs(values) + 0.5)
+
+def axis_times(start, size, distance, other_start, other_size):
+    # collision.axis_times() for a column of rows against a row of other spans
+    start, size, distance = start[:, None], size[:, None], distance[:, None]
+    overlapping = (start < other_start + other_size) & (start + size > other_start)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        near = (other_start - start - size) / distance
+        far = (other_start + other_size - start) / distance
+    enter = np.where(distance > 0, near, far)
+    leave = np.where(distance > 0, far, near)
+    still = distance == 0
+    enter = np.where(still, np.where(overlapping, -np.inf, np.inf), enter)
+    leave = np.where(still, np.where(overlapping, np.inf, -np.inf), leave)
+    return enter, leave
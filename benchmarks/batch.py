@@ -0,0 +1,57 @@
+import random
+import time
+
+import pygame
+
+import batch
+import game
+from batch import BatchGroup
+from camera import Camera
+from game import Projectile
+
+# Projectile update plus projectile-vs-enemy hit tests per frame, per-sprite update()
+# against the NumPy BatchGroup.
+#
+#   python -m benchmarks.batch
+
+COUNTS = [(100, 10), (1000, 100), (5000, 500)]  # (projectiles, enemies)
+FRAMES = 100
+
+def make_scene(projectiles, enemies, rng):
+    # Projectiles bounce around inside a view big enough that none are culled
+    camera = Camera(100000, 100000, -50000)
+    group = BatchGroup(cull=camera.view)
+    for _ in range(projectiles):
+        direction = (rng.choice([-1, 1]), rng.choice([-1, 0, 1]))
+        group.add(Projectile(rng.randint(0, 5000), rng.randint(0, 5000), direction, camera))
+    targets = pygame.sprite.Group()
+    for _ in range(enemies):
+        target = pygame.sprite.Sprite()
+        target.rect = pygame.Rect(rng.randint(0, 5000), rng.randint(0, 5000), 33, 45)
+        targets.add(target)
+    return group, targets
+
+def time_frames(group, targets):
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(FRAMES):
+        group.update()
+        hits += len(group.collide_group(targets))
+    return (time.perf_counter() - start) / FRAMES * 1000, hits
+
+def main():
+    if batch.np is None:
+        print("NumPy is not installed, BatchGroup falls back to per-sprite update()")
+        return
+    game.load_assets()
+    print(f"{'projectiles':>11} {'enemies':>8} {'per-sprite ms':>14} {'batched ms':>11}")
+    for projectiles, enemies in COUNTS:
+        batch.BATCH_MIN = float('inf')
+        per_sprite, hits = time_frames(*make_scene(projectiles, enemies, random.Random(1)))
+        batch.BATCH_MIN = 0
+        batched, batched_hits = time_frames(*make_scene(projectiles, enemies, random.Random(1)))
+        assert hits == batched_hits
+        print(f"{projectiles:>11} {enemies:>8} {per_sprite:>14.3f} {batched:>11.3f}")
+
+if __name__ == "__main__":
+    main()
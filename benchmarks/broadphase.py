@@ -0,0 +1,67 @@
+import random
+import time
+
+import pygame
+
+import game
+from collision import SpatialGroup
+from game import SCREEN_WIDTH, Platform
+
+# Collision cost per frame against a growing number of platforms, linear
+# spritecollide() over the whole group vs the SpatialGroup grid.
+#
+#   python -m benchmarks.broadphase
+
+PLATFORM_COUNTS = [10, 100, 1000, 5000]
+ENTITIES = 50  # Player plus enemies, each doing an x and a y query per frame
+FRAMES = 200
+
+def make_platforms(count, rng):
+    # Spread the platforms over a tall level so density stays the same as the count grows
+    platforms = []
+    for i in range(count):
+        x = rng.randint(0, SCREEN_WIDTH - 100)
+        y = -i * 50 + rng.randint(0, 30)
+        platforms.append(Platform(x, y, 100, 20, 'grass'))
+    return platforms
+
+def make_entities(count, platforms, rng):
+    entities = []
+    for _ in range(count):
+        entity = pygame.sprite.Sprite()
+        platform = rng.choice(platforms)
+        entity.rect = pygame.Rect(platform.rect.x, platform.rect.y - 45, 33, 45)
+        entities.append(entity)
+    return entities
+
+def time_frames(entities, collide):
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        step = 1 if frame % 2 else -1
+        for entity in entities:
+            entity.rect.y += step
+            collide(entity)
+            entity.rect.x += step
+            collide(entity)
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+def main():
+    game.load_assets()
+    print(f"{ENTITIES} entities, 2 queries each per frame, ms per frame")
+    print(f"{'platforms':>10} {'linear':>10} {'grid':>10} {'tests/frame':>12}")
+    for count in PLATFORM_COUNTS:
+        rng = random.Random(count)
+        platforms = make_platforms(count, rng)
+        entities = make_entities(ENTITIES, platforms, rng)
+
+        group = pygame.sprite.Group(platforms)
+        linear = time_frames(entities, lambda entity: pygame.sprite.spritecollide(entity, group, False))
+
+        grid = SpatialGroup(platforms)
+        grid_ms = time_frames(entities, lambda entity: grid.collide(entity.rect))
+        tests = grid.tests / FRAMES
+
+        print(f"{count:>10} {linear:>10.3f} {grid_ms:>10.3f} {tests:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import glob
+import os
+
+# No window and no sound card needed, like the headless runners
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import pytest
+
+import game
+from game import SCREEN_WIDTH, SCREEN_HEIGHT
+from resources import assets
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Unless told what to compare against, compare with the last run saved with
+    # --benchmark-save=baseline. Without one there is nothing a regression could be
+    # measured from, runs are only stored.
+    if config.option.benchmark_compare:
+        return
+    storage = config.option.benchmark_storage
+    baselines = []
+    if storage.startswith('file://'):
+        baselines = glob.glob(os.path.join(storage[len('file://'):], '*', '*_baseline.json'))
+    if baselines:
+        config.option.benchmark_compare = max(baselines, key=os.path.basename)
+    else:
+        config.option.benchmark_compare_fail = None
+
+@pytest.fixture(scope='session')
+def screen():
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    game.load_assets()
+    yield screen
+    pygame.quit()
+
+@pytest.fixture(scope='session')
+def background(screen):
+    return assets.image('assets/background.png', (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
+
+@pytest.fixture(scope='session')
+def font(screen):
+    return assets.font(None, 36)
@@ -0,0 +1,75 @@
+import os
+
+import pygame
+
+import game
+from game import InputFrame, World
+from replay import Recording
+
+# Writes the fixed benchmark corpus of scripted sessions to benchmarks/replays. The
+# recordings are committed, so later builds are timed on exactly the same input even
+# when these scripts change.
+#
+#   python -m benchmarks.corpus
+#   python replay.py benchmarks/replays/*.njr
+
+FRAMES = 3600  # One minute at 60 FPS
+SEED = 1234
+
+def jump_session():
+    # Double jumps up the level, drifting towards whichever side is further away
+    for frame in range(FRAMES):
+        held = [pygame.K_d] if (frame // 180) % 2 else [pygame.K_a]
+        pressed = [pygame.K_w] if frame % 40 in (0, 12) else []
+        yield InputFrame(held, pressed)
+
+def dash_session():
+    # Double taps left and right in turn, jumping between dashes
+    for frame in range(FRAMES):
+        phase = frame % 60
+        key = pygame.K_d if (frame // 60) % 2 else pygame.K_a
+        pressed = []
+        if phase in (0, 4):
+            pressed.append(key)
+        if phase == 30:
+            pressed.append(pygame.K_w)
+        yield InputFrame([key] if phase < 8 else [], pressed)
+
+def wall_stick_session():
+    # Runs into platform sides while falling so the player sticks, then wall jumps off
+    for frame in range(FRAMES):
+        key = pygame.K_d if (frame // 90) % 2 else pygame.K_a
+        pressed = [pygame.K_w] if frame % 45 == 0 else []
+        yield InputFrame([key], pressed)
+
+def shooting_session():
+    # Fires every few frames in all eight directions while moving about
+    directions = [(pygame.K_w,), (pygame.K_w, pygame.K_d), (pygame.K_d,), (pygame.K_s, pygame.K_d),
+                  (pygame.K_s,), (pygame.K_s, pygame.K_a), (pygame.K_a,), (pygame.K_w, pygame.K_a)]
+    for frame in range(FRAMES):
+        held = directions[(frame // 4) % len(directions)]
+        pressed = [pygame.K_w] if frame % 50 == 0 else []
+        yield InputFrame(held, pressed, frame % 4 == 0)
+
+SESSIONS = {
+    'jump': jump_session,
+    'dash': dash_session,
+    'wall_stick': wall_stick_session,
+    'shooting': shooting_session,
+}
+
+def main(directory='benchmarks/replays'):
+    game.load_assets()
+    os.makedirs(directory, exist_ok=True)
+    for name, session in SESSIONS.items():
+        recording = Recording(SEED)
+        world = World(SEED)
+        for inputs in session():
+            recording.record(inputs)
+            world.step(inputs)
+        path = os.path.join(directory, f'{name}.njr')
+        recording.save(path, world)
+        print(f"{path}: {len(recording)} frames, {os.path.getsize(path)} bytes, score {world.player.score}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import itertools
+import os
+import time
+
+# Software rendering on the dummy driver, like a low-end machine without a GPU
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+import game
+from game import SCREEN_WIDTH, SCREEN_HEIGHT, World
+from rendering import DirtyRenderer, FullRenderer
+from simulation import idle_inputs, random_inputs
+
+# Frames per second and CPU time per frame (simulation step plus drawing) for the
+# full-redraw path against the opt-in dirty-rect path.
+#
+#   python -m benchmarks.rendering
+
+FRAMES = 600
+
+def measure(renderer_class, inputs, screen, background, font):
+    world = World(seed=1)
+    renderer = renderer_class(screen, background, font)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    frames = 0
+    for frame_inputs in itertools.islice(inputs, FRAMES):
+        world.step(frame_inputs)
+        if world.player.dead:
+            break
+        renderer.draw(world)
+        frames += 1
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    return frames / wall, cpu / frames * 1000
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    background = pygame.image.load('assets/background.png').convert()
+    background = pygame.transform.scale(background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    game.load_assets()
+    font = pygame.font.Font(None, 36)
+
+    scenarios = [
+        ('standing still', idle_inputs),
+        ('bot, scrolling', lambda: random_inputs(3)),
+    ]
+    print(f"{'scenario':<16} {'renderer':<8} {'fps':>8} {'cpu ms/frame':>13}")
+    for name, inputs in scenarios:
+        for label, renderer_class in [('full', FullRenderer), ('dirty', DirtyRenderer)]:
+            fps, cpu = measure(renderer_class, inputs(), screen, background, font)
+            print(f"{name:<16} {label:<8} {fps:>8.0f} {cpu:>13.3f}")
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+# Asset loading time at startup, each run in a fresh process: cold (decode every PNG,
+# one at a time or on the thread pool) and warm (read the packed asset cache file).
+#
+#   python -m benchmarks.startup
+
+RUNS = 5
+
+CHILD = """
+import os, sys, time
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+import pygame
+import game
+from resources import assets
+pygame.init()
+pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+mode, cache_path = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == 'sequential':
+    assets.workers = 1
+if mode == 'warm':
+    assets.load_cache(cache_path)
+game.load_assets()
+assets.image('assets/background.png', (game.SCREEN_WIDTH, game.SCREEN_HEIGHT), alpha=False)
+assets.font(None, 36)
+elapsed = time.perf_counter() - start
+if mode == 'write':
+    assets.save_cache(cache_path)
+print(elapsed, assets.decodes)
+"""
+
+def run(mode, cache_path):
+    output = subprocess.run([sys.executable, '-c', CHILD, mode, cache_path], capture_output=True,
+                            text=True, check=True, env=dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1'))
+    elapsed, decodes = output.stdout.split()
+    return float(elapsed) * 1000, int(decodes)
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, 'asset_cache.bin')
+        run('write', cache_path)
+        print(f"{'start':<22} {'best ms':>8} {'PNG decodes':>12}")
+        for mode, label in [('sequential', 'cold, 1 thread'), ('cold', 'cold, thread pool'), ('warm', 'warm, asset cache')]:
+            results = [run(mode, cache_path) for _ in range(RUNS)]
+            best = min(elapsed for elapsed, _ in results)
+            print(f"{label:<22} {best:>8.2f} {results[0][1]:>12}")
+        print(f"cache file: {os.path.getsize(cache_path) / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import pytest
+
+import batch
+from batch import BATCH_MIN, BatchGroup
+from camera import Camera
+from collision import SpatialGroup
+from game import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, Platform, Projectile, World
+
+# Correctness checks for swept collisions, nothing moving at any speed may pass through
+# a platform between two steps. The timings are in test_hot_paths.py.
+
+GAP = 10  # Between the player and the wall, close enough for one dash step to clear it
+
+def wall_world(direction):
+    # A world whose only platforms are a floor and a 20px wide wall standing on it, with
+    # the player on the floor GAP px from the wall on the side direction dashes from
+    world = World(seed=1)
+    world.frame = FPS  # Past the dash cooldown
+    for sprite in world.platforms.sprites():
+        sprite.kill()
+    player = world.player
+    floor = Platform(0, player.rect.bottom, SCREEN_WIDTH, 20, 'stone')
+    wall = Platform(SCREEN_WIDTH // 2 - 10, floor.rect.top - 100, 20, 100, 'stone')
+    world.platforms.add(floor, wall)
+    if direction > 0:
+        player.rect.right = wall.rect.left - GAP
+    else:
+        player.rect.left = wall.rect.right + GAP
+    return world, wall
+
+@pytest.mark.parametrize('direction', [1, -1])
+def test_dash_stops_at_a_thin_wall(screen, direction):
+    # Without the sweep one 80px dash step would end entirely past the wall
+    world, wall = wall_world(direction)
+    player = world.player
+    assert player.dash_speed > GAP + wall.rect.width + player.rect.width
+    player.dash(direction)
+    assert player.dashing
+    player.update()
+    if direction > 0:
+        assert player.rect.right == wall.rect.left
+    else:
+        assert player.rect.left == wall.rect.right
+    assert player.on_wall
+
+def crossing_projectiles(count):
+    # count projectiles flying down at a 4px thick platform, fast enough to go from just
+    # above it to just below it in one step. Even ones cross the platform, odd ones
+    # pass beside it.
+    platform = Platform(0, 200, 240, 4, 'stone')
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+    projectiles = BatchGroup(cull=camera.view, solid=SpatialGroup(platform))
+    shots = []
+    for i in range(count):
+        x = (20 if i % 2 == 0 else 280) + i % 32 * 6
+        shot = Projectile(x, 0, (0, 1), camera)
+        shot.rect.bottom = platform.rect.top - 2
+        shot.speed = shot.rect.height + platform.rect.height + 4
+        shots.append(shot)
+    projectiles.add(shots)
+    return projectiles, shots
+
+def survivors(count):
+    projectiles, shots = crossing_projectiles(count)
+    projectiles.update()
+    return [(i, tuple(shot.rect)) for i, shot in enumerate(shots) if shot.alive()]
+
+def test_projectile_crossing_a_platform_is_killed(screen):
+    # Fewer than BATCH_MIN projectiles, moved by their own update()
+    assert [i for i, _ in survivors(2)] == [1]
+
+@pytest.mark.skipif(batch.np is None, reason="the batched path needs NumPy")
+def test_projectile_paths_agree(screen, monkeypatch):
+    # The NumPy sweep kills the same projectiles and leaves the rest in the same place
+    # as the per-sprite path
+    batched = survivors(BATCH_MIN)
+    assert [i for i, _ in batched] == list(range(1, BATCH_MIN, 2))
+    monkeypatch.setattr(batch, 'BATCH_MIN', BATCH_MIN + 1)
+    assert survivors(BATCH_MIN) == batched
@@ -0,0 +1,137 @@
+import random
+
+import pytest
+
+from camera import Camera
+from enemies import Enemy
+from batch import BatchGroup
+from game import SCREEN_WIDTH, SCREEN_HEIGHT, InputFrame, Platform, Projectile, World, generate_platforms
+from levelgen import ChunkGenerator
+from parallax import ParallaxLayer
+from rendering import DirtyRenderer, FullRenderer
+from resources import assets
+from simulation import random_inputs
+
+# pytest-benchmark suite over the game's hot paths, run with SDL's dummy drivers.
+# Every run is stored, once a baseline is saved later runs fail on a regression against it.
+#
+#   python -m pytest
+#   python -m pytest --benchmark-save=baseline  # accept the current numbers
+
+PLATFORM_COUNTS = [8, 32, 128]  # Platforms per generated chunk
+ENEMY_COUNTS = [10, 100, 1000]
+PROJECTILE_COUNTS = [10, 100, 1000]
+PARALLAX_COUNTS = [10, 100, 1000]  # Images baked into one layer
+
+def make_world(frames=0):
+    world = World(seed=1)
+    inputs = random_inputs(1)
+    for _ in range(frames):
+        world.step(next(inputs))
+    return world
+
+def test_platform_construction(benchmark, screen):
+    benchmark(Platform, 100, 200, 100, 20, 'grass')
+
+@pytest.mark.parametrize('count', PLATFORM_COUNTS)
+def test_generate_platforms(benchmark, screen, count):
+    # A camera a few chunks up the level, nothing spawned and nothing cached yet
+    world = make_world()
+
+    def setup():
+        for chunk in world.chunks.values():
+            for platform in chunk:
+                platform.kill()
+        world.chunks.clear()
+        world.enemies.empty()
+        world.chunk_enemies.clear()
+        world.level = ChunkGenerator(world.seed, SCREEN_WIDTH, SCREEN_HEIGHT, platforms_per_chunk=count)
+        world.camera.view.y = -3 * SCREEN_HEIGHT
+
+    benchmark.pedantic(generate_platforms, args=(world,), setup=setup, rounds=200)
+    assert len(world.platforms) >= count
+
+def test_check_collision(benchmark, screen):
+    # The player lands on the starting floor and pushes against nothing sideways
+    world = make_world()
+    player = world.player
+    floor = world.chunks[0][0]
+
+    def land():
+        player.rect.bottom = floor.rect.top + 1
+        player.change_x = 1
+        player.change_y = 1
+        player.check_collision('y')
+        player.check_collision('x')
+
+    benchmark(land)
+    assert player.rect.bottom == floor.rect.top
+
+def test_move_screen_down(benchmark, screen):
+    # Scrolls the camera up the level, new chunks are streamed in as it goes
+    world = make_world()
+    benchmark(world.player.move_screen_down)
+    assert world.player.score > 0
+
+@pytest.mark.parametrize('count', ENEMY_COUNTS)
+def test_enemy_update(benchmark, screen, count):
+    # Enemies patrolling the starting floor, which they never walk off, so every round
+    # does the same work
+    world = make_world()
+    rng = random.Random(count)
+    floor = world.chunks[0][0]
+    for _ in range(count):
+        x = rng.randint(floor.rect.left, floor.rect.right - 33)
+        world.enemies.add(Enemy(x, floor.rect.top - 45, world.platforms, world.player, world.get_ticks))
+    benchmark(world.enemies.update)
+
+@pytest.mark.parametrize('count', ENEMY_COUNTS)
+def test_enemy_update_offscreen(benchmark, screen, count):
+    # The same enemies on the platforms of the chunk above the view, where the level of
+    # detail scheduling only moves them in bulk every few frames
+    world = make_world()
+    rng = random.Random(count)
+    platforms = [platform for platform in world.platforms if platform.rect.bottom < world.camera.view.top - 100]
+    for _ in range(count):
+        platform = rng.choice(platforms)
+        x = rng.randint(platform.rect.left, platform.rect.right - 33)
+        world.enemies.add(Enemy(x, platform.rect.top - 45, world.platforms, world.player, world.get_ticks))
+    benchmark(world.enemies.update)
+
+@pytest.mark.parametrize('count', PROJECTILE_COUNTS)
+def test_projectile_update(benchmark, screen, count):
+    # A view big enough that nothing is culled however many rounds are run
+    camera = Camera(10 ** 7, 10 ** 7, -5 * 10 ** 6)
+    camera.view.x = -5 * 10 ** 6
+    rng = random.Random(count)
+    projectiles = BatchGroup(cull=camera.view)
+    for _ in range(count):
+        direction = (rng.choice([-1, 1]), rng.choice([-1, 0, 1]))
+        projectiles.add(Projectile(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT), direction, camera))
+    benchmark(projectiles.update)
+    assert len(projectiles) == count
+
+@pytest.mark.parametrize('count', PARALLAX_COUNTS)
+def test_parallax_layer(benchmark, screen, count):
+    # A drifting cloud layer, drawing it is two blits bounded by the strip's area however
+    # many clouds went into it
+    cloud = assets.image('assets/clouds/cloud_1.png')
+    rng = random.Random(count)
+    items = [(cloud, (rng.randrange(SCREEN_WIDTH * 2), rng.randrange(SCREEN_HEIGHT // 2))) for _ in range(count)]
+    layer = ParallaxLayer((SCREEN_WIDTH * 2, SCREEN_HEIGHT // 2 + cloud.get_height()), items, drift=1.0)
+    frames = iter(range(10 ** 9))
+    size = screen.get_size()
+    benchmark(lambda: screen.blits(layer.blits(0, next(frames), size), doreturn=False))
+
+@pytest.mark.parametrize('renderer_class', [FullRenderer, DirtyRenderer])
+def test_render_frame(benchmark, screen, background, font, renderer_class):
+    # A world some way into a bot run, so there are projectiles and a scrolled camera
+    world = make_world(300)
+    renderer = renderer_class(screen, background, font)
+    renderer.draw(world)
+    benchmark(renderer.draw, world)
+
+def test_world_step(benchmark, screen):
+    world = make_world(60)
+    inputs = InputFrame()
+    benchmark(world.step, inputs)
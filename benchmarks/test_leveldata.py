@@ -0,0 +1,19 @@
+from enemies import ENEMY_SIZE
+from game import SCREEN_WIDTH, SCREEN_HEIGHT
+from leveldata import LevelData, compile_level
+from levelgen import ChunkGenerator
+
+# Correctness checks for level files, the timings are in test_hot_paths.py
+
+def test_level_file_sections(tmp_path):
+    # Every hand-made section of the shipped level lays out and spawns its enemies
+    compiled = str(tmp_path / 'tower.njl')
+    compile_level('levels/tower.json', compiled)
+    level_data = LevelData(compiled)
+    for seed in range(50):
+        level = ChunkGenerator(seed, SCREEN_WIDTH, SCREEN_HEIGHT, sections=level_data, **level_data.tuning['level'])
+        for index in level_data.sections:
+            layout = level.layout(index)
+            for x, y in level.spawns(index, layout, ENEMY_SIZE[0]):
+                assert any(px <= x and x + ENEMY_SIZE[0] <= px + width and y == py for px, py, width, _, _ in layout)
+    level_data.close()
@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+from enemies import ENEMY_SIZE
+from game import SCREEN_WIDTH, SCREEN_HEIGHT
+from levelgen import ChunkGenerator
+
+# Correctness checks for the level generator, the timings are in test_hot_paths.py
+
+CHUNKS = range(-40, 1)
+
+def level(generator, order):
+    # index -> (layout, enemy spawns) of every chunk, asked for in order
+    chunks = {}
+    for index in order:
+        layout = generator.layout(index)
+        chunks[index] = (layout, generator.spawns(index, layout, ENEMY_SIZE[0]))
+    return chunks
+
+@pytest.mark.parametrize('seed', range(8))
+def test_same_seed_same_level(seed):
+    # Going up the level, against a shuffled order on another generator whose small
+    # cache has it lay out evicted chunks again
+    upwards = level(ChunkGenerator(seed, SCREEN_WIDTH, SCREEN_HEIGHT), reversed(CHUNKS))
+    order = list(CHUNKS) * 2
+    random.Random(seed).shuffle(order)
+    shuffled = level(ChunkGenerator(seed, SCREEN_WIDTH, SCREEN_HEIGHT, cache_size=4), order)
+    assert shuffled == upwards
+    other = level(ChunkGenerator(seed + 1, SCREEN_WIDTH, SCREEN_HEIGHT), reversed(CHUNKS))
+    assert other != upwards
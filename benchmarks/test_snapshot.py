@@ -0,0 +1,27 @@
+import pytest
+
+from game import World
+from replay import world_checksum
+from simulation import random_inputs
+from snapshot import restore, snapshot
+
+# Correctness checks for world snapshots, the timings are in test_hot_paths.py
+
+@pytest.mark.parametrize('seed', range(8))
+def test_snapshot_restore_is_deterministic(screen, seed):
+    # Stepping on from a restored snapshot gives the same world as the first time
+    world = World(seed)
+    inputs = random_inputs(seed)
+    for _ in range(600):
+        world.step(next(inputs))
+    saved = snapshot(world)
+    frames = [next(inputs) for _ in range(600)]
+
+    def play():
+        for inputs_frame in frames:
+            world.step(inputs_frame)
+        return world_checksum(world), [enemy.pack_state() for enemy in world.enemies]
+
+    first = play()
+    restore(world, saved)
+    assert play() == first
@@ -0,0 +1,26 @@
+import pygame
+
+class Camera:
+    # The part of the world that is on screen. Sprites keep fixed world coordinates
+    # and are only shifted by the camera offset when drawn, so scrolling the whole
+    # level is one change to view.y however many sprites there are.
+    def __init__(self, width, height, y=0):
+        self.view = pygame.Rect(0, y, width, height)
+
+    @property
+    def y(self):
+        return self.view.y
+
+    def scroll(self, dy):
+        self.view.y += dy
+
+    def to_screen(self, position):
+        return (position[0] - self.view.x, position[1] - self.view.y)
+
+    def is_visible(self, rect):
+        return self.view.colliderect(rect)
+
+    def draw(self, surface, sprites):
+        offset_x, offset_y = self.view.topleft
+        for sprite in sprites:
+            surface.blit(sprite.image, (sprite.rect.x - offset_x, sprite.rect.y - offset_y))
@@ -0,0 +1,116 @@
+import math
+
+import pygame
+
+# Cell size of the uniform grid, a bit larger than a player so most queries touch 1-4 cells
+CELL_SIZE = 64
+
+def axis_times(start, size, distance, other_start, other_size):
+    # Open interval of times during which two spans overlap along one axis
+    if distance == 0:
+        if start < other_start + other_size and start + size > other_start:
+            return -math.inf, math.inf
+        return math.inf, -math.inf
+    near = (other_start - start - size) / distance
+    far = (other_start + other_size - start) / distance
+    return (near, far) if distance > 0 else (far, near)
+
+def time_of_impact(rect, dx, dy, other):
+    # When rect, moved by (dx, dy) over one step, first overlaps other, as a time in
+    # [0, 1). Rects already overlapping at the start only count if they still do at the
+    # end, the same as a discrete test after the move. None if they never overlap.
+    enter_x, leave_x = axis_times(rect.x, rect.width, dx, other.x, other.width)
+    enter_y, leave_y = axis_times(rect.y, rect.height, dy, other.y, other.height)
+    enter = max(enter_x, enter_y)
+    leave = min(leave_x, leave_y)
+    if enter >= leave or enter >= 1 or leave <= 0:
+        return None
+    if enter < 0:
+        return 0.0 if leave > 1 else None
+    return enter
+
+class SpatialGroup(pygame.sprite.Group):
+    # A sprite group that also buckets its sprites into a uniform grid, so collision
+    # queries only look at sprites in the cells a rect overlaps instead of the whole group.
+    # Sprites added, removed or killed keep the grid up to date automatically. Sprites
+    # are bucketed once when added and must not move while in the group.
+    def __init__(self, *sprites, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.sprite_cells = {}
+        self.tests = 0  # Number of rect tests done by queries, for profiling
+        super().__init__(*sprites)
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size, (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.insert(sprite, self.cell_range(sprite.rect))
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.discard(sprite, self.sprite_cells.pop(sprite))
+
+    def insert(self, sprite, cell_range):
+        self.sprite_cells[sprite] = cell_range
+        x0, y0, x1, y1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                self.cells.setdefault((cx, cy), {})[sprite] = None
+
+    def discard(self, sprite, cell_range):
+        x0, y0, x1, y1 = cell_range
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = self.cells[(cx, cy)]
+                del cell[sprite]
+                if not cell:
+                    del self.cells[(cx, cy)]
+
+    def candidates(self, rect):
+        # Sprites sharing a cell with rect, each once, in a deterministic order
+        x0, y0, x1, y1 = self.cell_range(rect)
+        if x0 == x1 and y0 == y1:
+            return self.cells.get((x0, y0), {})
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        return found
+
+    def collide(self, rect):
+        # Same result as pygame.sprite.spritecollide() against the whole group
+        candidates = self.candidates(rect)
+        self.tests += len(candidates)
+        return [sprite for sprite in candidates if rect.colliderect(sprite.rect)]
+
+    def visible(self, rect):
+        # Sprites overlapping rect, like collide() but for drawing: not counted in tests,
+        # which are only the game logic's collision work
+        return [sprite for sprite in self.candidates(rect) if rect.colliderect(sprite.rect)]
+
+    def collide_any(self, rect):
+        # Same result as pygame.sprite.spritecollideany() against the whole group
+        for sprite in self.candidates(rect):
+            self.tests += 1
+            if rect.colliderect(sprite.rect):
+                return sprite
+        return None
+
+    def sweep(self, rect, dx, dy):
+        # First sprite rect runs into when moved by (dx, dy), as (sprite, time), or None.
+        # One query over the cells the whole path covers, so however fast rect moves it
+        # can't pass through a thin sprite between two frames.
+        path = rect.union(rect.move(dx, dy))
+        candidates = self.candidates(path)
+        self.tests += len(candidates)
+        hit = None
+        for sprite in candidates:
+            time = time_of_impact(rect, dx, dy, sprite.rect)
+            if time is not None and (hit is None or time < hit[1]):
+                hit = (sprite, time)
+        return hit
@@ -1,16 +1,59 @@
+import os
+import struct
+
 import pygame
 import random
 
+from animation import load_clip
+
+# assets/enemy is not in the repo yet, until it is enemies reuse the player frames
+if os.path.isdir('assets/enemy'):
+    ENEMY_IDLE_FRAMES = ['assets/enemy/idle/0.png', 'assets/enemy/idle/1.png']
+    ENEMY_RUNNING_FRAMES = ['assets/enemy/running/0.png', 'assets/enemy/running/1.png']
+    ENEMY_ATTACK_FRAMES = ['assets/enemy/attack/0.png', 'assets/enemy/attack/1.png']
+else:
+    ENEMY_IDLE_FRAMES = ['assets/player/idle/0.png', 'assets/player/idle/1.png']
+    ENEMY_RUNNING_FRAMES = ['assets/player/running/0.png', 'assets/player/running/1.png']
+    ENEMY_ATTACK_FRAMES = ENEMY_RUNNING_FRAMES
+
+ENEMY_SIZE = (33, 45)
+
+# Enemies within this many pixels of the view get the full update every frame, the rest
+# are updated once every FAR_INTERVAL frames
+NEAR_MARGIN = 64
+FAR_INTERVAL = 8
+
+# Enemy.state() packed: position, velocity, direction, clip, frame and animation
+# counters, last attack time, health and the flag bits below
+ENEMY_STATE = struct.Struct('<iiddbBBBBBBBBiiB')
+FACING_RIGHT, ATTACKING, GROUNDED = (1 << bit for bit in range(3))
+
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, x, y, platforms, player):
+    # platforms is a collision.SpatialGroup. Slotted like game.Player, there can be
+    # hundreds of these
+    __slots__ = ('_Sprite__g', 'image', 'rect', 'idle_clip', 'running_clip', 'attack_clip', 'clip',
+                 'clip_frame', 'change_x', 'change_y', 'platforms', 'player', 'ground', 'idle_frame',
+                 'running_frame', 'attack_frame', 'idle_animation_counter', 'running_animation_counter',
+                 'attack_animation_counter', 'facing_right', 'direction', 'attacking', 'last_attack_time',
+                 'health', 'get_ticks')
+
+    idle_animation_speed = 24
+    running_animation_speed = 8
+    attack_animation_speed = 12
+    speed = 2
+    gravity = 0.6
+    attack_range = 100
+    attack_cooldown = 500  # milliseconds
+
+    def __init__(self, x, y, platforms, player, get_ticks=pygame.time.get_ticks):
         super().__init__()
-        #self.idle_frames = [pygame.image.load('assets/enemy/idle/0.png').convert_alpha(),
-                 #           pygame.image.load('assets/enemy/idle/1.png').convert_alpha()]
-        #self.running_frames = [pygame.image.load('assets/enemy/running/0.png').convert_alpha(),
-                       #        pygame.image.load('assets/enemy/running/1.png').convert_alpha()]
-       # self.attack_frames = [pygame.image.load('assets/enemy/attack/0.png').convert_alpha(),
-                  #           pygame.image.load('assets/enemy/attack/1.png').convert_alpha()]
-        self.image = self.get_idle_image(0)
+        # Shared animation clips, frames for both facings are loaded once
+        self.idle_clip = load_clip(ENEMY_IDLE_FRAMES, ENEMY_SIZE)
+        self.running_clip = load_clip(ENEMY_RUNNING_FRAMES, (36, 42))
+        self.attack_clip = load_clip(ENEMY_ATTACK_FRAMES, (36, 42))
+        self.clip = self.idle_clip  # Clip and frame currently shown
+        self.clip_frame = 0
+        self.image = self.idle_clip.frame(0)
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
@@ -18,59 +61,81 @@ class Enemy(pygame.sprite.Sprite):
         self.change_y = 0
         self.platforms = platforms
         self.player = player
+        self.ground = None  # Platform it stands on, None while in the air
         self.idle_frame = 0
         self.running_frame = 0
         self.attack_frame = 0
-        self.idle_animation_speed = 24
-        self.running_animation_speed = 8
-        self.attack_animation_speed = 12
         self.idle_animation_counter = 0
         self.running_animation_counter = 0
         self.attack_animation_counter = 0
         self.facing_right = True
         self.direction = 1  # 1 for right, -1 for left
-        self.speed = 2
-        self.gravity = 0.6
-        self.attack_range = 100
         self.attacking = False
-        self.attack_cooldown = 500  # milliseconds
         self.last_attack_time = 0
         self.health = 100  # Set initial health
+        self.get_ticks = get_ticks  # World.get_ticks when running inside a World
+
+    def state(self):
+        flags = ((FACING_RIGHT if self.facing_right else 0) | (ATTACKING if self.attacking else 0) |
+                 (GROUNDED if self.ground is not None else 0))
+        clip = (self.idle_clip, self.running_clip, self.attack_clip).index(self.clip)
+        return (self.rect.x, self.rect.y, self.change_x, self.change_y, self.direction, clip,
+                self.clip_frame, self.idle_frame, self.running_frame, self.attack_frame,
+                self.idle_animation_counter, self.running_animation_counter,
+                self.attack_animation_counter, self.last_attack_time, self.health, flags)
+
+    def set_state(self, state):
+        (self.rect.x, self.rect.y, self.change_x, self.change_y, self.direction, clip, clip_frame,
+         self.idle_frame, self.running_frame, self.attack_frame, self.idle_animation_counter,
+         self.running_animation_counter, self.attack_animation_counter, self.last_attack_time,
+         self.health, flags) = state
+        self.facing_right = bool(flags & FACING_RIGHT)
+        self.attacking = bool(flags & ATTACKING)
+        # The platform is found again in the strip right under the enemy's feet
+        feet = pygame.Rect(self.rect.x, self.rect.bottom, self.rect.width, 1)
+        self.ground = self.platforms.collide_any(feet) if flags & GROUNDED else None
+        self.show((self.idle_clip, self.running_clip, self.attack_clip)[clip], clip_frame)
+
+    def pack_state(self):
+        return ENEMY_STATE.pack(*self.state())
+
+    def unpack_state(self, data):
+        self.set_state(ENEMY_STATE.unpack(data))
+
+    def show(self, clip, frame):
+        self.clip = clip
+        self.clip_frame = frame
+        self.image = clip.frame(frame, self.facing_right)
+        return self.image
 
     def get_idle_image(self, frame):
-        idle_frame = pygame.Surface((33, 45), pygame.SRCALPHA).convert_alpha()
-        idle_frame.blit(self.idle_frames[frame], (0, 0))
-        return idle_frame
+        return self.show(self.idle_clip, frame)
 
     def get_running_image(self, frame):
-        running_frame = pygame.Surface((36, 42), pygame.SRCALPHA).convert_alpha()
-        running_frame.blit(self.running_frames[frame], (0, 0))
-        return running_frame
+        return self.show(self.running_clip, frame)
 
     def get_attack_image(self, frame):
-        attack_frame = pygame.Surface((36, 42), pygame.SRCALPHA).convert_alpha()
-        attack_frame.blit(self.attack_frames[frame], (0, 0))
-        return attack_frame
+        return self.show(self.attack_clip, frame)
 
     def update(self):
         self.calc_gravity()
 
+        x = self.rect.x
         self.rect.x += self.change_x
-        self.check_collision('x')
+        self.check_collision('x', self.rect.x - x)
 
+        y = self.rect.y
         self.rect.y += self.change_y
-        self.check_collision('y')
+        self.check_collision('y', self.rect.y - y)
 
         if self.attacking:
             self.attack_animation_counter += 1
             if self.attack_animation_counter >= self.attack_animation_speed:
                 self.attack_animation_counter = 0
-                self.attack_frame = (self.attack_frame + 1) % len(self.attack_frames)
+                self.attack_frame = (self.attack_frame + 1) % len(self.attack_clip)
                 self.image = self.get_attack_image(self.attack_frame)
-                if not self.facing_right:
-                    self.image = pygame.transform.flip(self.image, True, False)
 
-                if self.attack_frame == len(self.attack_frames) - 1:
+                if self.attack_frame == len(self.attack_clip) - 1:
                     self.attacking = False
 
         elif abs(self.player.rect.x - self.rect.x) <= self.attack_range:
@@ -80,18 +145,14 @@ class Enemy(pygame.sprite.Sprite):
             self.idle_animation_counter += 1
             if self.idle_animation_counter >= self.idle_animation_speed:
                 self.idle_animation_counter = 0
-                self.idle_frame = (self.idle_frame + 1) % len(self.idle_frames)
+                self.idle_frame = (self.idle_frame + 1) % len(self.idle_clip)
                 self.image = self.get_idle_image(self.idle_frame)
-                if not self.facing_right:
-                    self.image = pygame.transform.flip(self.image, True, False)
 
             self.running_animation_counter += 1
             if self.running_animation_counter >= self.running_animation_speed:
                 self.running_animation_counter = 0
-                self.running_frame = (self.running_frame + 1) % len(self.running_frames)
+                self.running_frame = (self.running_frame + 1) % len(self.running_clip)
                 self.image = self.get_running_image(self.running_frame)
-                if not self.facing_right:
-                    self.image = pygame.transform.flip(self.image, True, False)
 
             self.patrol()
 
@@ -99,6 +160,29 @@ class Enemy(pygame.sprite.Sprite):
         if self.health <= 0:
             self.kill()
 
+    def update_far(self, frames):
+        # Stands in for that many update() calls while off screen: no animation and no
+        # attacks, walking along the platform it stands on in one move, or falling with
+        # one sweep while in the air
+        self.attacking = False
+        if self.ground is not None and self.ground.alive():
+            left = self.ground.rect.left
+            right = self.ground.rect.right - self.rect.width
+            x = self.rect.x + self.direction * self.speed * frames
+            if x < left or x > right:
+                x = max(left, min(x, right))
+                self.direction *= -1
+                self.facing_right = not self.facing_right
+            self.rect.x = x
+        else:
+            fall = 0
+            for _ in range(frames):
+                self.calc_gravity()
+                fall += self.change_y
+            y = self.rect.y
+            self.rect.y += fall
+            self.check_collision('y', self.rect.y - y)
+
     def calc_gravity(self):
         if self.change_y == 0:
             self.change_y = 1
@@ -109,7 +193,7 @@ class Enemy(pygame.sprite.Sprite):
         if not self.attacking:
             self.change_x = self.direction * self.speed
             self.rect.x += self.change_x
-            self.check_collision('x')
+            self.check_collision('x', self.change_x)
 
             # Reverse direction if at edge of platform or colliding with another platform
             if self.on_edge() or self.colliding():
@@ -118,7 +202,7 @@ class Enemy(pygame.sprite.Sprite):
                 self.facing_right = not self.facing_right
 
     def attack(self):
-        current_time = pygame.time.get_ticks()
+        current_time = self.get_ticks()
         if current_time - self.last_attack_time >= self.attack_cooldown:
             self.attacking = True
             self.attack_animation_counter = 0
@@ -135,33 +219,90 @@ class Enemy(pygame.sprite.Sprite):
         if self.health < 0:
             self.health = 0
 
-    def check_collision(self, direction):
+    def check_collision(self, direction, moved=0):
+        # Swept from where the rect was before moving, like Player.check_collision()
         if direction == 'x':
-            collisions = pygame.sprite.spritecollide(self, self.platforms, False)
-            for platform in collisions:
+            hit = self.platforms.sweep(self.rect.move(-moved, 0), moved, 0)
+            if hit is not None:
+                platform = hit[0]
                 if self.change_x > 0:
                     self.rect.right = platform.rect.left
                 elif self.change_x < 0:
                     self.rect.left = platform.rect.right
 
         elif direction == 'y':
-            collisions = pygame.sprite.spritecollide(self, self.platforms, False)
-            for platform in collisions:
+            hit = self.platforms.sweep(self.rect.move(0, -moved), 0, moved)
+            self.ground = None
+            if hit is not None:
+                platform = hit[0]
                 if self.change_y > 0:
                     self.rect.bottom = platform.rect.top
                     self.change_y = 0
+                    self.ground = platform
                 elif self.change_y < 0:
                     self.rect.top = platform.rect.bottom
                     self.change_y = 0
 
     def on_edge(self):
-        self.rect.x += self.direction * self.speed
-        collision = pygame.sprite.spritecollideany(self, self.platforms)
-        self.rect.x -= self.direction * self.speed
+        # Looks one pixel down, the enemy stands exactly on top of its platform
+        collision = self.platforms.collide_any(self.rect.move(self.direction * self.speed, 1))
         return collision is None
 
     def colliding(self):
-        return pygame.sprite.spritecollideany(self, self.platforms)
+        return self.platforms.collide_any(self.rect)
+
+class EnemyGroup(pygame.sprite.Group):
+    # Enemies updated by level of detail. The ones within margin of the camera view get
+    # the full update() every frame. The rest are split into interval buckets in spawn
+    # order and every frame one bucket gets update_far(interval), so an off-screen enemy
+    # costs a fraction of one cheap update per frame. Far enemies become near when their
+    # bucket comes up, near ones go back to their bucket as soon as they leave.
+    # Enemies that fell below the view are gone for good, the level below it is dropped.
+    # Unlike projectiles they are not moved by a batch.BatchGroup: every move depends on
+    # the enemy's own swept collisions, ledge probes and chasing the player, so there is
+    # no shared integration step to vectorize. Level of detail is what keeps many cheap.
+    def __init__(self, camera, margin=NEAR_MARGIN, interval=FAR_INTERVAL):
+        self.camera = camera
+        self.margin = margin
+        self.interval = interval
+        self.buckets = [{} for _ in range(interval)]
+        self.bucket_of = {}
+        self.near = {}
+        self.next_bucket = 0
+        self.frame = 0
+        super().__init__()
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.bucket_of[sprite] = self.next_bucket
+        self.buckets[self.next_bucket][sprite] = None
+        self.next_bucket = (self.next_bucket + 1) % self.interval
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        del self.buckets[self.bucket_of.pop(sprite)][sprite]
+        self.near.pop(sprite, None)
+
+    def update(self):
+        view = self.camera.view
+        near_rect = view.inflate(2 * self.margin, 2 * self.margin)
+
+        for enemy in list(self.near):
+            enemy.update()
+            if enemy.alive() and not near_rect.colliderect(enemy.rect):
+                del self.near[enemy]
+
+        for enemy in list(self.buckets[self.frame % self.interval]):
+            if enemy in self.near:
+                continue
+            if near_rect.colliderect(enemy.rect):
+                self.near[enemy] = None
+                enemy.update()
+            elif enemy.rect.top > view.bottom:
+                enemy.kill()
+            else:
+                enemy.update_far(self.interval)
+        self.frame += 1
 
 # Example player class with take_damage method
 class Player(pygame.sprite.Sprite):
@@ -0,0 +1,512 @@
+import pygame
+import random
+import struct
+
+from animation import load_clip
+from audio import audio
+from batch import BatchGroup
+from camera import Camera
+from collision import SpatialGroup
+from enemies import ENEMY_SIZE, Enemy, EnemyGroup
+from leveldata import tuned
+from levelgen import ChunkGenerator
+from pools import Pool, RingBuffer
+from profiler import NullProfiler
+from resources import assets, image_paths
+from tiles import PlatformSurfaceCache, TileAtlas, is_decor
+
+# Screen dimensions
+SCREEN_WIDTH = 500
+SCREEN_HEIGHT = 500
+
+# The game logic moves in pixels per frame, so it always steps at this fixed rate
+FPS = 60
+
+# Keys the game logic reads while they are held down
+CONTROL_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+
+PLAYER_IDLE_FRAMES = ['assets/player/idle/0.png', 'assets/player/idle/1.png']
+PLAYER_RUNNING_FRAMES = ['assets/player/running/0.png', 'assets/player/running/1.png']
+
+# Ghost images kept while dashing, older ones are overwritten
+GHOST_TRAIL_LENGTH = 8
+
+PROJECTILE_DAMAGE = 25
+
+# Player.state() packed: position, velocity, jumps, dash and double tap times, clip,
+# frame and animation counters, health, score and the flag bits below
+PLAYER_STATE = struct.Struct('<iiddBiiiiBBBBBBiiB')
+DASHING, FACING_RIGHT, MOVING, ON_WALL, WALL_STICKING, DEAD = (1 << bit for bit in range(6))
+
+# Loaded by load_assets()
+tile_atlas = None
+platform_surfaces = None
+projectile_image = None
+
+def load_assets():
+    global tile_atlas, platform_surfaces
+    global projectile_image
+
+    # Decode every image on the asset manager's thread pool while the rest is set up
+    assets.preload(image_paths())
+
+    # Load and pre-scale every tile once, platforms bake their images from the atlas
+    tile_atlas = TileAtlas()
+    platform_surfaces = PlatformSurfaceCache(tile_atlas)
+
+    # Load every sound effect and reserve their mixer channels
+    audio.preload()
+
+    # Load projectile image
+    projectile_image = assets.image('assets/player/shuriken.png')
+    assets.wait()
+
+class InputFrame:
+    # Everything the player did during one simulation step: the keys held down,
+    # the keys pressed this step and whether the shoot button was clicked
+    def __init__(self, held=(), pressed=(), shoot=False):
+        self.held = frozenset(held)
+        self.pressed = tuple(pressed)
+        self.shoot = shoot
+
+    def __getitem__(self, key):
+        # Indexes like pygame.key.get_pressed()
+        return key in self.held
+
+class Platform(pygame.sprite.Sprite):
+    def __init__(self, x, y, width, height, block_type):
+        super().__init__()
+        # Shared with every other platform of the same type and size
+        self.image = platform_surfaces.get(block_type, width, height)
+        self.block_type = block_type
+        self.rect = self.image.get_rect()
+        self.rect.x = x
+        self.rect.y = y
+
+class Decor(pygame.sprite.Sprite):
+    # Hand-made level decoration, drawn behind the platforms and never collided with
+    def __init__(self, x, y, width, height, block_type):
+        super().__init__()
+        self.image = assets.image(f'assets/{block_type}.png')
+        self.rect = self.image.get_rect(topleft=(x, y))
+
+class Projectile(pygame.sprite.Sprite):
+    # Projectiles come from World.projectile_pool and go back to it when killed
+    def __init__(self, x, y, direction, camera, pool=None):
+        super().__init__()
+        self.image = projectile_image  # Use the loaded projectile image
+        self.rect = self.image.get_rect()
+        self.speed = 10
+        self.pool = pool
+        self.reset(x, y, direction, camera)
+
+    def reset(self, x, y, direction, camera):
+        self.rect.center = (x, y)
+        self.direction = direction
+        self.camera = camera
+
+    def velocity(self):
+        return (self.direction[0] * self.speed, self.direction[1] * self.speed)
+
+    def kill(self):
+        if self.alive():
+            super().kill()
+            if self.pool is not None:
+                self.pool.release(self)
+
+    def update(self):
+        self.rect.x += self.direction[0] * self.speed
+        self.rect.y += self.direction[1] * self.speed
+        view = self.camera.view
+        if self.rect.right < view.left or self.rect.left > view.right or self.rect.bottom < view.top or self.rect.top > view.bottom:
+            self.kill()
+
+class Player(pygame.sprite.Sprite):
+    # Slotted, the tuning values are shared class attributes and only what changes while
+    # playing is kept per instance. state() / set_state() copy that out as plain numbers.
+    __slots__ = ('_Sprite__g', 'image', 'rect', 'world', 'platforms', 'idle_clip', 'running_clip',
+                 'clip', 'clip_frame', 'change_x', 'change_y', 'jumps', 'dashing', 'dash_time',
+                 'dash_cooldown_time', 'last_left_tap', 'last_right_tap', 'ghost_trail', 'idle_frame',
+                 'running_frame', 'idle_animation_counter', 'running_animation_counter', 'facing_right',
+                 'moving', 'on_wall', 'wall_sticking', 'health', 'score', 'dead')
+
+    gravity = 0.6
+    jump_speed = -12
+    max_jumps = 2
+    dash_speed = 80
+    dash_duration = 40
+    dash_cooldown = 30
+    double_tap_threshold = 200
+    idle_animation_speed = 24
+    running_animation_speed = 8
+    acceleration = 0
+    deceleration = 0
+    max_speed = 6
+
+    def __init__(self, world):
+        super().__init__()
+        self.idle_clip = load_clip(PLAYER_IDLE_FRAMES, (33, 45))
+        self.running_clip = load_clip(PLAYER_RUNNING_FRAMES, (36, 42))
+        self.clip = self.idle_clip  # Clip and frame currently shown
+        self.clip_frame = 0
+        self.image = self.idle_clip.frame(0)
+        self.rect = self.image.get_rect()
+        self.rect.x = 100
+        self.rect.y = SCREEN_HEIGHT - self.rect.height - 100
+        self.change_x = 0
+        self.change_y = 0
+        self.world = world
+        self.platforms = world.platforms
+        self.jumps = 0
+        self.dashing = False
+        self.dash_time = 0
+        self.dash_cooldown_time = 0
+        self.last_left_tap = 0  # Ticks of the last A and D presses, for double taps
+        self.last_right_tap = 0
+        self.ghost_trail = RingBuffer(GHOST_TRAIL_LENGTH)
+        self.idle_frame = 0
+        self.running_frame = 0
+        self.idle_animation_counter = 0
+        self.running_animation_counter = 0
+        self.facing_right = True
+        self.moving = False
+        self.on_wall = False
+        self.wall_sticking = False
+        self.health = 100  # Player health
+        self.score = 0  # Player score
+        self.dead = False
+
+    def state(self):
+        flags = ((DASHING if self.dashing else 0) | (FACING_RIGHT if self.facing_right else 0) |
+                 (MOVING if self.moving else 0) | (ON_WALL if self.on_wall else 0) |
+                 (WALL_STICKING if self.wall_sticking else 0) | (DEAD if self.dead else 0))
+        return (self.rect.x, self.rect.y, self.change_x, self.change_y, self.jumps, self.dash_time,
+                self.dash_cooldown_time, self.last_left_tap, self.last_right_tap,
+                0 if self.clip is self.idle_clip else 1, self.clip_frame, self.idle_frame,
+                self.running_frame, self.idle_animation_counter, self.running_animation_counter,
+                self.health, self.score, flags)
+
+    def set_state(self, state):
+        (self.rect.x, self.rect.y, self.change_x, self.change_y, self.jumps, self.dash_time,
+         self.dash_cooldown_time, self.last_left_tap, self.last_right_tap, clip, clip_frame,
+         self.idle_frame, self.running_frame, self.idle_animation_counter,
+         self.running_animation_counter, self.health, self.score, flags) = state
+        self.dashing = bool(flags & DASHING)
+        self.facing_right = bool(flags & FACING_RIGHT)
+        self.moving = bool(flags & MOVING)
+        self.on_wall = bool(flags & ON_WALL)
+        self.wall_sticking = bool(flags & WALL_STICKING)
+        self.dead = bool(flags & DEAD)
+        self.ghost_trail.clear()
+        self.show(self.running_clip if clip else self.idle_clip, clip_frame)
+
+    def pack_state(self):
+        return PLAYER_STATE.pack(*self.state())
+
+    def unpack_state(self, data):
+        self.set_state(PLAYER_STATE.unpack(data))
+
+    def show(self, clip, frame):
+        self.clip = clip
+        self.clip_frame = frame
+        self.image = clip.frame(frame, self.facing_right)
+        return self.image
+
+    def get_idle_image(self, frame):
+        return self.show(self.idle_clip, frame)
+
+    def get_running_image(self, frame):
+        return self.show(self.running_clip, frame)
+
+    def update(self):
+        keys = self.world.keys
+        if keys[pygame.K_a]:
+            self.move_left()
+        elif keys[pygame.K_d]:
+            self.move_right()
+        else:
+            self.stop()
+
+        if self.moving:
+            self.running_animation_counter += 1
+            if self.running_animation_counter >= self.running_animation_speed:
+                self.running_animation_counter = 0
+                self.running_frame = (self.running_frame + 1) % len(self.running_clip)
+                self.get_running_image(self.running_frame)
+        else:
+            self.running_frame = 0
+            self.idle_animation_counter += 1
+            if self.idle_animation_counter >= self.idle_animation_speed:
+                self.idle_animation_counter = 0
+                self.idle_frame = (self.idle_frame + 1) % len(self.idle_clip)
+                self.get_idle_image(self.idle_frame)
+
+        if self.dashing:
+            if self.world.get_ticks() - self.dash_time >= self.dash_duration:
+                self.dashing = False
+                self.change_x = 0
+                self.ghost_trail.clear()
+            else:
+                ghost_image = self.clip.ghost_frame(self.clip_frame, self.facing_right)
+                self.ghost_trail.append((ghost_image, self.rect.topleft))
+
+        self.calc_gravity()
+
+        with self.world.profiler.phase('collision'):
+            y = self.rect.y
+            self.rect.y += self.change_y
+            self.check_collision('y', self.rect.y - y)
+
+            x = self.rect.x
+            self.rect.x += self.change_x
+            self.check_collision('x', self.rect.x - x)
+
+        self.rect.x = max(0, min(self.rect.x, SCREEN_WIDTH - self.rect.width))
+
+        camera = self.world.camera
+        if self.rect.top > camera.view.bottom:
+            self.die()
+
+        # Move screen down if player is high enough
+        if self.rect.top - camera.y <= SCREEN_HEIGHT / 3:
+            self.move_screen_down()
+
+    def calc_gravity(self):
+        if self.change_y == 0:
+            self.change_y = 1
+        else:
+            self.change_y += self.gravity
+
+    def jump(self):
+        if self.wall_sticking:
+            self.wall_sticking = False
+            self.change_y = self.jump_speed
+            if self.facing_right:
+                self.change_x = -self.max_speed
+            else:
+                self.change_x = self.max_speed
+            audio.play('jump', self.world.get_ticks())
+        elif self.jumps < self.max_jumps:
+            self.change_y = self.jump_speed
+            self.jumps += 1
+            audio.play('jump', self.world.get_ticks())
+
+    def move_left(self):
+        if not self.dashing:
+            self.change_x = -self.max_speed
+            self.moving = True
+            if self.facing_right:
+                self.facing_right = False
+                self.show(self.clip, self.clip_frame)
+
+    def move_right(self):
+        if not self.dashing:
+            self.change_x = self.max_speed
+            self.moving = True
+            if not self.facing_right:
+                self.facing_right = True
+                self.show(self.clip, self.clip_frame)
+
+    def stop(self):
+        if not self.dashing:
+            self.change_x = 0
+            self.moving = False
+            self.wall_sticking = False
+
+    def dash(self, direction):
+        current_time = self.world.get_ticks()
+        if current_time - self.dash_cooldown_time >= self.dash_cooldown:
+            self.dashing = True
+            self.change_x = direction * self.dash_speed
+            self.dash_time = current_time
+            self.dash_cooldown_time = current_time
+            audio.play('dash', current_time)
+
+    def check_collision(self, direction, moved=0):
+        # moved is how far the rect just went along direction. The sweep starts from where
+        # it was, so an 80px dash stops at the first platform in its way.
+        if direction == 'x':
+            hit = self.platforms.sweep(self.rect.move(-moved, 0), moved, 0)
+            self.on_wall = False
+            if hit is not None:
+                platform = hit[0]
+                if self.change_x > 0:
+                    self.rect.right = platform.rect.left
+                    self.on_wall = True
+                elif self.change_x < 0:
+                    self.rect.left = platform.rect.right
+                    self.on_wall = True
+            if self.on_wall and self.change_y > 0:
+                self.wall_stick()
+        elif direction == 'y':
+            hit = self.platforms.sweep(self.rect.move(0, -moved), 0, moved)
+            if hit is not None:
+                platform = hit[0]
+                if self.change_y > 0:
+                    self.rect.bottom = platform.rect.top
+                    self.change_y = 0
+                    self.jumps = 0
+                elif self.change_y < 0:
+                    self.rect.top = platform.rect.bottom
+                    self.change_y = 0
+
+    def wall_stick(self):
+        keys = self.world.keys
+        if (keys[pygame.K_a] and self.change_x < 0) or (keys[pygame.K_d] and self.change_x > 0):
+            self.wall_sticking = True
+            self.change_y = 0
+
+    def take_damage(self, amount):
+        self.health -= amount
+        audio.play('hit', self.world.get_ticks())
+        if self.health <= 0:
+            self.die()
+
+    def die(self):
+        # The front end (window or headless runner) decides what happens next
+        self.dead = True
+
+    def move_screen_down(self):
+        # Platforms keep their world positions, only the camera moves up
+        scroll_speed = self.world.scroll_speed
+        self.world.camera.scroll(-scroll_speed)
+        self.score += scroll_speed  # Increase score when screen moves down
+        with self.world.profiler.phase('generate'):
+            generate_platforms(self.world)
+
+    def shoot(self, direction):
+        if direction != (0, 0):
+            projectile = self.world.projectile_pool.acquire(self.rect.centerx, self.rect.centery, direction, self.world.camera)
+            self.world.projectiles.add(projectile)
+            audio.play('shoot', self.world.get_ticks())
+
+def build_chunk(world, layout):
+    # Platforms and decorations of one chunk's layout, added to the world
+    chunk = [Decor(*spec) if is_decor(spec[4]) else Platform(*spec) for spec in layout]
+    world.platforms.add([sprite for sprite in chunk if isinstance(sprite, Platform)])
+    world.decor.add([sprite for sprite in chunk if isinstance(sprite, Decor)])
+    return chunk
+
+def generate_platforms(world):
+    # Keep the level chunks from one chunk above the view down to its bottom spawned and
+    # drop whole chunks once they are below the view. Only does work when the camera
+    # crossed into another chunk. Enemies spawn with their chunk and go with it.
+    level = world.level
+    view = world.camera.view
+    first = level.chunk_index(view.top - level.chunk_height)
+    last = level.chunk_index(view.bottom - 1)
+
+    for index in range(first, last + 1):
+        if index not in world.chunks:
+            layout = level.layout(index)
+            world.chunks[index] = build_chunk(world, layout)
+
+            enemies = [Enemy(x, y - ENEMY_SIZE[1], world.platforms, world.player, world.get_ticks)
+                       for x, y in level.spawns(index, layout, ENEMY_SIZE[0])]
+            world.enemies.add(enemies)
+            world.chunk_enemies[index] = enemies
+
+    for index in [index for index in world.chunks if index > last]:
+        for sprite in world.chunks.pop(index):
+            sprite.kill()
+        for enemy in world.chunk_enemies.pop(index):
+            enemy.kill()
+
+class World:
+    # All game state, advanced one fixed step at a time from an explicit InputFrame.
+    # Nothing in here reads the keyboard, the wall clock or the display, so the same
+    # world runs behind the window (main.py) or headless (simulation.py).
+    # Sprites use world coordinates, the camera decides what is on screen. Platforms are
+    # static and only live in self.platforms. Projectiles are a BatchGroup that moves them
+    # all at once, enemies are updated by level of detail and all_sprites holds the rest
+    # of what needs update(). The sky and clouds are only drawn, by the renderers'
+    # parallax layers, and are not part of the world. level_data (leveldata.LevelData)
+    # changes the player and level tuning and adds hand-made chunks.
+    def __init__(self, seed=None, profiler=None, level_data=None):
+        self.profiler = profiler if profiler is not None else NullProfiler()
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed  # All level randomness comes from it, through the level generator
+        self.frame = 0
+        self.keys = InputFrame()
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.scroll_speed = 1  # Pixels the camera moves up per frame while the player is high
+
+        self.platforms = SpatialGroup()
+        self.decor = pygame.sprite.Group()
+        self.all_sprites = pygame.sprite.Group()
+        self.projectiles = BatchGroup(cull=self.camera.view, solid=self.platforms)
+        self.enemies = EnemyGroup(self.camera)
+        self.projectile_pool = Pool(lambda *args: Projectile(*args, pool=self.projectile_pool))
+
+        # The level is streamed in chunks, the first one holds the starting floor
+        tuning = level_data.tuning if level_data is not None else {}
+        self.level = ChunkGenerator(seed, SCREEN_WIDTH, SCREEN_HEIGHT, sections=level_data, **tuning.get('level', {}))
+        self.chunks = {}  # Chunk index -> its live platforms and decorations
+        self.chunk_enemies = {}  # Chunk index -> enemies spawned with it
+
+        self.player = tuned(Player, tuning.get('player'))(self)
+
+        self.all_sprites.add(self.player)
+
+        generate_platforms(self)
+
+    def get_ticks(self):
+        # Simulated milliseconds, replaces pygame.time.get_ticks() in the game logic
+        return self.frame * 1000 // FPS
+
+    def step(self, inputs):
+        self.keys = inputs
+        profiler = self.profiler
+
+        with profiler.phase('input'):
+            self.handle_input(inputs)
+
+        # Collision and generate are timed inside update as well
+        with profiler.phase('update'):
+            self.all_sprites.update()
+
+        with profiler.phase('enemies'):
+            self.enemies.update()
+
+        with profiler.phase('projectiles'):
+            self.projectiles.update()
+
+            for projectile, enemy in self.projectiles.collide_group(self.enemies):
+                if projectile.alive():
+                    enemy.take_damage(PROJECTILE_DAMAGE)
+                    projectile.kill()
+                    audio.play('hit', self.get_ticks())
+        self.frame += 1
+
+    def handle_input(self, inputs):
+        player = self.player
+
+        for key in inputs.pressed:
+            if key == pygame.K_w:
+                player.jump()
+
+            if key == pygame.K_a:
+                current_time = self.get_ticks()
+                if current_time - player.last_left_tap < player.double_tap_threshold:
+                    player.dash(-1)
+                player.last_left_tap = current_time
+
+            if key == pygame.K_d:
+                current_time = self.get_ticks()
+                if current_time - player.last_right_tap < player.double_tap_threshold:
+                    player.dash(1)
+                player.last_right_tap = current_time
+
+        if inputs.shoot:
+            direction = [0, 0]
+            if inputs[pygame.K_w]:
+                direction[1] = -1
+            if inputs[pygame.K_s]:
+                direction[1] = 1
+            if inputs[pygame.K_a]:
+                direction[0] = -1
+            if inputs[pygame.K_d]:
+                direction[0] = 1
+
+            player.shoot(direction)
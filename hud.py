@@ -0,0 +1,113 @@
+from collections import OrderedDict
+
+import pygame
+
+from profiler import counters
+
+HUD_COLOR = (255, 255, 255)
+HUD_MARGIN = 10
+
+# The score surface is made wide enough for this many digits and a sign, it only grows
+# for a longer score
+SCORE_DIGITS = 10
+SCORE_LABEL = "Score: "
+
+class GlyphAtlas:
+    # Every character of chars rendered once. Strings made of them are composed by
+    # blitting glyphs side by side instead of rasterizing the text again.
+    def __init__(self, font, color, chars):
+        self.glyphs = {char: font.render(char, True, color) for char in chars}
+        self.height = font.get_height()
+        counters['surfaces'] += len(self.glyphs)
+
+    def width(self, text):
+        return sum(self.glyphs[char].get_width() for char in text)
+
+    def draw(self, target, text, position):
+        x, y = position
+        blits = []
+        for char in text:
+            glyph = self.glyphs[char]
+            blits.append((glyph, (x, y)))
+            x += glyph.get_width()
+        target.blits(blits, doreturn=False)
+
+    def draw_into(self, surface, text):
+        # surface is cleared and text drawn at its left edge. Glyphs never overlap, MAX
+        # copies their pixels onto the transparent surface without darkening the
+        # antialiased edges.
+        surface.fill((0, 0, 0, 0))
+        x = 0
+        for char in text:
+            glyph = self.glyphs[char]
+            surface.blit(glyph, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += glyph.get_width()
+
+class TextCache:
+    # Memoized font.render() for strings that keep coming back, the least recently used
+    # ones are dropped past capacity
+    def __init__(self, font, color, capacity=64):
+        self.font = font
+        self.color = color
+        self.capacity = capacity
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text):
+        surface = self.cache.get(text)
+        if surface is not None:
+            self.hits += 1
+            self.cache.move_to_end(text)
+            return surface
+        self.misses += 1
+        surface = self.cache[text] = self.font.render(text, True, self.color)
+        counters['surfaces'] += 1
+        if len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+        return surface
+
+class Hud:
+    # Score in the top left corner, health in the top right. draw() puts the score's
+    # glyphs straight on the screen. items() is for renderers that keep HUD images
+    # around: the score is redrawn in place on one surface made on the first call,
+    # the health image comes from the text cache and each item says whether it changed.
+    def __init__(self, font, screen_width, color=HUD_COLOR):
+        self.screen_width = screen_width
+        self.score_atlas = GlyphAtlas(font, color, SCORE_LABEL + "-0123456789")
+        self.text = TextCache(font, color)
+        self.score = None
+        self.score_image = None
+        digit = max(self.score_atlas.width(char) for char in "-0123456789")
+        self.score_width = self.score_atlas.width(SCORE_LABEL) + (SCORE_DIGITS + 1) * digit
+        self.health = None
+        self.health_image = None
+
+    def score_surface(self, width):
+        counters['surfaces'] += 1
+        return pygame.Surface((width, self.score_atlas.height), pygame.SRCALPHA)
+
+    def health_position(self, image):
+        return (self.screen_width - HUD_MARGIN - image.get_width(), HUD_MARGIN)
+
+    def draw(self, target, player):
+        self.score_atlas.draw(target, f"{SCORE_LABEL}{player.score}", (HUD_MARGIN, HUD_MARGIN))
+        health_image = self.text.render(f"Health: {player.health}")
+        target.blit(health_image, self.health_position(health_image))
+
+    def items(self, player):
+        # [(image, screen position, changed since the last call)], drawn in this order
+        score_changed = player.score != self.score
+        if score_changed:
+            self.score = player.score
+            text = f"{SCORE_LABEL}{player.score}"
+            width = self.score_atlas.width(text)
+            if self.score_image is None or width > self.score_image.get_width():
+                self.score_image = self.score_surface(max(width, self.score_width))
+            self.score_atlas.draw_into(self.score_image, text)
+        health_changed = player.health != self.health
+        if health_changed:
+            self.health = player.health
+            self.health_image = self.text.render(f"Health: {player.health}")
+        return [(self.score_image, (HUD_MARGIN, HUD_MARGIN), score_changed),
+                (self.health_image, self.health_position(self.health_image), health_changed)]
@@ -0,0 +1,165 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+
+from enemies import ENEMY_SIZE
+from tiles import BLOCK_TILES, is_decor
+
+# Level files: tuning values and hand-made level sections, written as JSON and compiled
+# to a packed binary next to the source. Launches memory-map the compiled file and only
+# read the header, tuning and section table up front; a section's blocks are unpacked
+# when the level generator first asks for that chunk. The compiled file is rebuilt when
+# the source changed since it was written.
+#
+#   {"tuning": {"player": {"gravity": 0.6, "jump_speed": -12},
+#               "level": {"platforms_per_chunk": 8}},
+#    "sections": [{"chunk": -2, "blocks": [["stone", 0, 440, 200, 20],
+#                                          ["large_decor/2", 40, 396]]}]}
+#
+# Blocks are [type, x, y, width, height] with y from the top of the chunk, decorations
+# are [type, x, y] and take the size of their image.
+#
+#   python leveldata.py levels/tower.json
+
+LEVEL_MAGIC = b'NJLV'
+LEVEL_VERSION = 1
+# Magic, version, source mtime, block type count, tuning count, section count
+HEADER = struct.Struct('<4sHqHHI')
+BLOCK_TYPE = struct.Struct('<16s')
+# Group and name, value and whether it is a float
+TUNING = struct.Struct('<16s24sd?')
+# Chunk index, first block, block count
+SECTION = struct.Struct('<iII')
+# x, y from the chunk top, width, height, block type
+BLOCK = struct.Struct('<hhHHB')
+
+# What a level file may change, Player class attributes and ChunkGenerator arguments
+PLAYER_TUNING = ('gravity', 'jump_speed', 'max_jumps', 'dash_speed', 'dash_duration', 'dash_cooldown',
+                 'double_tap_threshold', 'acceleration', 'deceleration', 'max_speed')
+LEVEL_TUNING = ('platforms_per_chunk', 'platform_width', 'platform_height', 'max_attempts', 'enemies_per_chunk')
+TUNABLE = {'player': PLAYER_TUNING, 'level': LEVEL_TUNING}
+
+def compile_level(source_path, compiled_path):
+    with open(source_path) as source_file:
+        source = json.load(source_file)
+
+    tuning = []
+    for group, values in source.get('tuning', {}).items():
+        for name, value in values.items():
+            if name not in TUNABLE.get(group, ()):
+                raise ValueError(f"{source_path}: {group}.{name} is not a tuning value")
+            if group == 'level' and name == 'platform_width' and value < ENEMY_SIZE[0]:
+                raise ValueError(f"{source_path}: level.platform_width must be at least the enemy width {ENEMY_SIZE[0]}")
+            tuning.append(TUNING.pack(group.encode(), name.encode(), value, isinstance(value, float)))
+
+    block_types = []
+    sections = []
+    blocks = []
+    for section in sorted(source.get('sections', []), key=lambda section: section['chunk']):
+        first = len(blocks)
+        for block in section['blocks']:
+            block_type, x, y, *size = block
+            if block_type not in BLOCK_TILES and not (is_decor(block_type) and os.path.exists(f'assets/{block_type}.png')):
+                raise ValueError(f"{source_path}: unknown block type {block_type!r} in chunk {section['chunk']}")
+            width, height = size if not is_decor(block_type) else (0, 0)
+            if block_type not in block_types:
+                block_types.append(block_type)
+            blocks.append(BLOCK.pack(x, y, width, height, block_types.index(block_type)))
+        sections.append(SECTION.pack(section['chunk'], first, len(blocks) - first))
+
+    chunks = [HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, os.stat(source_path).st_mtime_ns, len(block_types),
+                          len(tuning), len(sections))]
+    chunks.extend(BLOCK_TYPE.pack(block_type.encode()) for block_type in block_types)
+    chunks.extend(tuning)
+    chunks.extend(sections)
+    chunks.extend(blocks)
+    with open(compiled_path, 'wb') as compiled_file:
+        compiled_file.write(b''.join(chunks))
+
+def compiled_path(source_path):
+    return os.path.splitext(source_path)[0] + '.njl'
+
+def is_fresh(source_path, compiled):
+    try:
+        with open(compiled, 'rb') as compiled_file:
+            magic, version, mtime, *_ = HEADER.unpack(compiled_file.read(HEADER.size))
+    except (OSError, struct.error):
+        return False
+    return magic == LEVEL_MAGIC and version == LEVEL_VERSION and mtime == os.stat(source_path).st_mtime_ns
+
+def load_level(path):
+    # A .json source is compiled first unless its .njl is up to date, a .njl is used as is
+    if path.endswith('.njl'):
+        return LevelData(path)
+    compiled = compiled_path(path)
+    if not is_fresh(path, compiled):
+        compile_level(path, compiled)
+    return LevelData(compiled)
+
+class LevelData:
+    # A compiled level file mapped into memory. tuning is {'player': {...}, 'level': {...}},
+    # blocks(index) gives a hand-made chunk's blocks or None when the chunk is generated.
+    def __init__(self, path):
+        with open(path, 'rb') as level_file:
+            self.data = mmap.mmap(level_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, type_count, tuning_count, section_count = HEADER.unpack_from(self.data, 0)
+        if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+            raise ValueError(f"{path} is not a version {LEVEL_VERSION} level file")
+        offset = HEADER.size
+
+        self.block_types = []
+        for _ in range(type_count):
+            name, = BLOCK_TYPE.unpack_from(self.data, offset)
+            self.block_types.append(name.rstrip(b'\0').decode())
+            offset += BLOCK_TYPE.size
+
+        self.tuning = {}
+        for _ in range(tuning_count):
+            group, name, value, is_float = TUNING.unpack_from(self.data, offset)
+            values = self.tuning.setdefault(group.rstrip(b'\0').decode(), {})
+            values[name.rstrip(b'\0').decode()] = value if is_float else int(value)
+            offset += TUNING.size
+
+        self.sections = {}  # Chunk index -> (first block, block count)
+        for _ in range(section_count):
+            index, first, count = SECTION.unpack_from(self.data, offset)
+            self.sections[index] = (first, count)
+            offset += SECTION.size
+        self.blocks_offset = offset
+
+    def blocks(self, index):
+        section = self.sections.get(index)
+        if section is None:
+            return None
+        first, count = section
+        start = self.blocks_offset + first * BLOCK.size
+        return [(x, y, width, height, self.block_types[block_type])
+                for x, y, width, height, block_type in BLOCK.iter_unpack(self.data[start:start + count * BLOCK.size])]
+
+    def close(self):
+        self.data.close()
+
+def tuned(cls, values):
+    # Subclass of a slotted sprite class with some of its tuning class attributes changed,
+    # the class itself when nothing is changed
+    if not values:
+        return cls
+    return type(cls.__name__, (cls,), dict(values, __slots__=(), __module__=cls.__module__))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile level files")
+    parser.add_argument('levels', nargs='+')
+    args = parser.parse_args()
+
+    for path in args.levels:
+        compile_level(path, compiled_path(path))
+        level = LevelData(compiled_path(path))
+        blocks = sum(count for _, count in level.sections.values())
+        print(f"{compiled_path(path)}: {len(level.sections)} sections, {blocks} blocks, "
+              f"{sum(len(values) for values in level.tuning.values())} tuning values")
+        level.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import random
+import time
+from collections import OrderedDict
+
+from tiles import is_decor
+
+# Cell size of the per-chunk grid used for the overlap check
+CELL_SIZE = 64
+
+class ChunkGenerator:
+    # Seeded level generator. The world is cut into horizontal chunks of chunk_height
+    # pixels, chunk 0 holds the starting floor and negative indexes go up the level.
+    # Every chunk is laid out from its own RNG, seeded by (seed, index), so the same seed
+    # gives the same level whatever order chunks are asked for in. Layouts are plain
+    # (x, y, width, height, block_type) tuples kept in an LRU cache of recent chunks.
+    #
+    # A chunk gets one platform per row band, each tried at most max_attempts times
+    # against the chunk's own grid, so generating a chunk has a fixed upper bound.
+    # spawns() places enemies_per_chunk enemies on a chunk's platforms, from another RNG
+    # seeded the same way. sections (leveldata.LevelData) replaces chunks with hand-made
+    # ones, whose decorations take no part in spawning.
+    def __init__(self, seed, width, chunk_height, platforms_per_chunk=8, platform_width=100,
+                 platform_height=20, max_attempts=8, cache_size=16, enemies_per_chunk=2, sections=None):
+        self.seed = seed
+        self.width = width
+        self.chunk_height = chunk_height
+        self.platforms_per_chunk = platforms_per_chunk
+        self.platform_width = platform_width
+        self.platform_height = platform_height
+        self.max_attempts = max_attempts
+        self.cache_size = cache_size
+        self.enemies_per_chunk = enemies_per_chunk
+        self.sections = sections
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.worst_time = 0.0  # Slowest chunk generated so far, in seconds
+
+    def chunk_index(self, y):
+        return y // self.chunk_height
+
+    def layout(self, index):
+        layout = self.cache.get(index)
+        if layout is not None:
+            self.hits += 1
+            self.cache.move_to_end(index)
+            return layout
+
+        self.misses += 1
+        start = time.perf_counter()
+        layout = self.generate(index)
+        self.worst_time = max(self.worst_time, time.perf_counter() - start)
+
+        self.cache[index] = layout
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return layout
+
+    def generate(self, index):
+        top = index * self.chunk_height
+        if self.sections is not None:
+            blocks = self.sections.blocks(index)
+            if blocks is not None:
+                return tuple((x, top + y, width, height, block_type) for x, y, width, height, block_type in blocks)
+
+        # String seeds hash the same in every process, unlike hash()
+        rng = random.Random(f"{self.seed}:{index}")
+        bottom = top + self.chunk_height
+        layout = []
+        grid = {}
+
+        region_top = top
+        region_bottom = bottom - self.platform_height
+        count = self.platforms_per_chunk
+        if index == 0:
+            # Starting floor, then ensure the first platforms are within jumpable distance
+            # for the player, the random ones go in the top third like they always did
+            self.place(layout, grid, (0, bottom - 40, self.width, 40, 'grass'))
+            for step in (1, 2):
+                x = rng.randint(0, self.width - self.platform_width)
+                self.place(layout, grid, (x, bottom - 60 - step * 50, self.platform_width, self.platform_height, 'grass'))
+            region_bottom = top + self.chunk_height // 3
+            count = max(1, count * (region_bottom - region_top) // self.chunk_height)
+
+        row_height = (region_bottom - region_top) / count
+        for row in range(count):
+            row_top = region_top + int(row * row_height)
+            row_bottom = region_top + int((row + 1) * row_height)
+            for _ in range(self.max_attempts):
+                x = rng.randint(0, self.width - self.platform_width)
+                y = rng.randint(row_top, max(row_top, row_bottom - 1))
+                platform = (x, y, self.platform_width, self.platform_height, 'grass')
+                if not self.overlaps(grid, platform):
+                    self.place(layout, grid, platform)
+                    break
+        return tuple(layout)
+
+    def spawns(self, index, layout, enemy_width):
+        # (x, y) feet positions on distinct platforms of the chunk's layout, none in the
+        # starting chunk and none on decorations or blocks too narrow to stand on
+        if index == 0:
+            return []
+        rng = random.Random(f"{self.seed}:{index}:enemies")
+        layout = [block for block in layout if not is_decor(block[4]) and block[2] >= enemy_width]
+        platforms = rng.sample(layout, min(self.enemies_per_chunk, len(layout)))
+        return [(rng.randint(x, x + width - enemy_width), y) for x, y, width, _, _ in platforms]
+
+    def cells(self, platform):
+        x, y, width, height, _ = platform
+        for cx in range(x // CELL_SIZE, (x + width - 1) // CELL_SIZE + 1):
+            for cy in range(y // CELL_SIZE, (y + height - 1) // CELL_SIZE + 1):
+                yield (cx, cy)
+
+    def place(self, layout, grid, platform):
+        layout.append(platform)
+        for cell in self.cells(platform):
+            grid.setdefault(cell, []).append(platform)
+
+    def overlaps(self, grid, platform):
+        x, y, width, height, _ = platform
+        for cell in self.cells(platform):
+            for px, py, pw, ph, _ in grid.get(cell, ()):
+                if x < px + pw and x + width > px and y < py + ph and y + height > py:
+                    return True
+        return False
+
+    def report(self):
+        requests = self.hits + self.misses
+        hit_rate = self.hits / requests if requests else 0.0
+        return (f"level chunks: {self.misses} generated, {self.hits} from cache ({hit_rate:.1%}), "
+                f"slowest {self.worst_time * 1000:.2f} ms")
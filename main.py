@@ -1,420 +1,313 @@
+import argparse
+import asyncio
+import os
 import pygame
 import sys
-import random
-
-pygame.init()
-
-# Screen dimensions
-SCREEN_WIDTH = 500
-SCREEN_HEIGHT = 500
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Ninjump")
-
-# Load background image
-background_image = pygame.image.load('assets/background.png')
-background_image = pygame.transform.scale(background_image, (SCREEN_WIDTH, SCREEN_HEIGHT))
-
-# Load block images
-grass_block_image = pygame.image.load('assets/grass/1.png').convert_alpha()
-stone_block_image = pygame.image.load('assets/stone/1.png').convert_alpha()
-dirt_block_image = pygame.image.load('assets/grass/5.png').convert_alpha()
-
-# Load sound effects
-jump_sound = pygame.mixer.Sound('assets/sfx/jump.wav')
-dash_sound = pygame.mixer.Sound('assets/sfx/dash.wav')
-shoot_sound = pygame.mixer.Sound('assets/sfx/shoot.wav')  # Add shooting sound
-
-# Load projectile image
-projectile_image = pygame.image.load('assets/player/shuriken.png').convert_alpha()  # Make sure to provide the correct path to your projectile image
-
-# Initialize font
-font = pygame.font.Font(None, 36)
-
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height, block_type):
-        super().__init__()
-        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
-        if block_type == 'grass':
-            block_image = grass_block_image
-        elif block_type == 'stone':
-            block_image = stone_block_image
-        elif block_type == 'dirt':
-            block_image = dirt_block_image
-
-        block_image = pygame.transform.scale(block_image, (16, 16))
-
-        for i in range(0, width, 16):
-            for j in range(0, height, 16):
-                self.image.blit(block_image, (i, j))
-
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-
-class Projectile(pygame.sprite.Sprite):
-    def __init__(self, x, y, direction):
-        super().__init__()
-        self.image = projectile_image  # Use the loaded projectile image
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-        self.speed = 10
-        self.direction = direction
-
-    def update(self):
-        self.rect.x += self.direction[0] * self.speed
-        self.rect.y += self.direction[1] * self.speed
-        if self.rect.right < 0 or self.rect.left > SCREEN_WIDTH or self.rect.bottom < 0 or self.rect.top > SCREEN_HEIGHT:
-            self.kill()
-
-class Player(pygame.sprite.Sprite):
-    def __init__(self, platforms):
-        super().__init__()
-        self.idle_spritesheet = [pygame.image.load(f'assets/player/idle/0.png').convert_alpha(), pygame.image.load(f'assets/player/idle/1.png').convert_alpha() ]
-        self.running_frames = [pygame.image.load(f'assets/player/running/0.png').convert_alpha(), pygame.image.load(f'assets/player/running/1.png').convert_alpha()]
-        self.image = self.get_idle_image(0)
-        self.rect = self.image.get_rect()
-        self.rect.x = 100
-        self.rect.y = SCREEN_HEIGHT - self.rect.height - 100
-        self.change_x = 0
-        self.change_y = 0
-        self.gravity = 0.6
-        self.jump_speed = -12
-        self.platforms = platforms
-        self.jumps = 0
-        self.max_jumps = 2
-        self.dash_speed = 80
-        self.dash_duration = 40
-        self.dash_cooldown = 30
-        self.dashing = False
-        self.dash_time = 0
-        self.dash_cooldown_time = 0
-        self.last_key_time = {'left': 0, 'right': 0}
-        self.double_tap_threshold = 200
-        self.ghost_trail = []
-        self.idle_frame = 0
-        self.running_frame = 0
-        self.idle_animation_speed = 24
-        self.running_animation_speed = 8
-        self.idle_animation_counter = 0
-        self.running_animation_counter = 0
-        self.last_update = pygame.time.get_ticks()
-        self.facing_right = True
-        self.last_direction = 'right'
-        self.acceleration = 0
-        self.deceleration = 0
-        self.max_speed = 6
-        self.moving = False
-        self.on_wall = False
-        self.wall_sticking = False
-        self.health = 100  # Player health
-        self.score = 0  # Player score
-
-    def get_idle_image(self, frame):
-        idle_frame = pygame.Surface((33, 45), pygame.SRCALPHA).convert_alpha()
-        idle_frame.blit(self.idle_spritesheet[frame], (0, 0))
-        return idle_frame
-
-    def get_running_image(self, frame):
-        running_frame = pygame.Surface((36, 42), pygame.SRCALPHA).convert_alpha()
-        running_frame.blit(self.running_frames[frame], (0, 0))
-        return running_frame
-
-    def update(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_a]:
-            self.move_left()
-        elif keys[pygame.K_d]:
-            self.move_right()
-        else:
-            self.stop()
-
-        if self.moving:
-            self.running_animation_counter += 1
-            if self.running_animation_counter >= self.running_animation_speed:
-                self.running_animation_counter = 0
-                self.running_frame = (self.running_frame + 1) % len(self.running_frames)
-                self.image = self.get_running_image(self.running_frame)
-                if not self.facing_right:
-                    self.image = pygame.transform.flip(self.image, True, False)
-        else:
-            self.running_frame = 0
-            self.idle_animation_counter += 1
-            if self.idle_animation_counter >= self.idle_animation_speed:
-                self.idle_animation_counter = 0
-                self.idle_frame = (self.idle_frame + 1) % len(self.idle_spritesheet)
-                self.image = self.get_idle_image(self.idle_frame)
-                if not self.facing_right:
-                    self.image = pygame.transform.flip(self.image, True, False)
-
-        if self.dashing:
-            if pygame.time.get_ticks() - self.dash_time >= self.dash_duration:
-                self.dashing = False
-                self.change_x = 0
-                self.ghost_trail = []
-            else:
-                ghost_image = self.image.copy()
-                ghost_image.set_alpha(100)
-                self.ghost_trail.append((ghost_image, self.rect.topleft))
-
-        self.calc_gravity()
-
-        self.rect.y += self.change_y
-        self.check_collision('y')
-
-        self.rect.x += self.change_x
-        self.check_collision('x')
-
-        self.rect.x = max(0, min(self.rect.x, SCREEN_WIDTH - self.rect.width))
-        
-        if self.rect.top > SCREEN_HEIGHT:
-            self.die()
-
-        # Move screen down if player is high enough
-        if self.rect.top <= SCREEN_HEIGHT / 3:
-            self.move_screen_down()
-
-    def calc_gravity(self):
-        if self.change_y == 0:
-            self.change_y = 1
-        else:
-            self.change_y += self.gravity
-
-    def jump(self):
-        if self.wall_sticking:
-            self.wall_sticking = False
-            self.change_y = self.jump_speed
-            if self.facing_right:
-                self.change_x = -self.max_speed
-            else:
-                self.change_x = self.max_speed
-            jump_sound.play()
-        elif self.jumps < self.max_jumps:
-            self.change_y = self.jump_speed
-            self.jumps += 1
-            jump_sound.play()
-
-    def move_left(self):
-        if not self.dashing:
-            self.change_x = -self.max_speed
-            self.facing_right = False
-            self.moving = True
-            if self.last_direction == 'right':
-                self.image = pygame.transform.flip(self.image, True, False)
-                self.last_direction = 'left'
-
-    def move_right(self):
-        if not self.dashing:
-            self.change_x = self.max_speed
-            self.facing_right = True
-            self.moving = True
-            if self.last_direction == 'left':
-                self.image = pygame.transform.flip(self.image, True, False)
-                self.last_direction = 'right'
-
-    def stop(self):
-        if not self.dashing:
-            self.change_x = 0
-            self.moving = False
-            self.wall_sticking = False
-
-    def dash(self, direction):
-        if pygame.time.get_ticks() - self.dash_cooldown_time >= self.dash_cooldown:
-            self.dashing = True
-            self.change_x = direction * self.dash_speed
-            self.dash_time = pygame.time.get_ticks()
-            self.dash_cooldown_time = pygame.time.get_ticks()
-            dash_sound.play()
-
-    def check_collision(self, direction):
-        if direction == 'x':
-            collisions = pygame.sprite.spritecollide(self, self.platforms, False)
-            self.on_wall = False
-            for platform in collisions:
-                if self.change_x > 0:
-                    self.rect.right = platform.rect.left
-                    self.on_wall = True
-                elif self.change_x < 0:
-                    self.rect.left = platform.rect.right
-                    self.on_wall = True
-            if self.on_wall and self.change_y > 0:
-                self.wall_stick()
-        elif direction == 'y':
-            collisions = pygame.sprite.spritecollide(self, self.platforms, False)
-            for platform in collisions:
-                if self.change_y > 0:
-                    self.rect.bottom = platform.rect.top
-                    self.change_y = 0
-                    self.jumps = 0
-                elif self.change_y < 0:
-                    self.rect.top = platform.rect.bottom
-                    self.change_y = 0
-
-    def wall_stick(self):
-        keys = pygame.key.get_pressed()
-        if (keys[pygame.K_a] and self.change_x < 0) or (keys[pygame.K_d] and self.change_x > 0):
-            self.wall_sticking = True
-            self.change_y = 0
-
-    def take_damage(self, amount):
-        self.health -= amount
-        if self.health <= 0:
-            self.die()
-
-    def die(self):
-        print("Player has died")
-        pygame.quit()
-        sys.exit()
-
-    def move_screen_down(self):
-        self.rect.y += 1
-        for platform in self.platforms:
-            platform.rect.y += 1
-            if platform.rect.top > SCREEN_HEIGHT:
-                platform.kill()
-        self.score += 1  # Increase score when screen moves down
-        generate_platforms(self.platforms)
-
-    def shoot(self, direction):
-        if direction != (0, 0):
-            projectile = Projectile(self.rect.centerx, self.rect.centery, direction)
-            all_sprites.add(projectile)
-            projectiles.add(projectile)
-            shoot_sound.play()
-
-class Cloud(pygame.sprite.Sprite):
-    def __init__(self, x, y, speed, image_path):
-        super().__init__()
-        self.image = pygame.image.load(image_path).convert_alpha()
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-        self.speed = 0.5
-
-    def update(self):
-        self.rect.x += self.speed
-        if self.rect.x > SCREEN_WIDTH:
-            self.rect.x = -self.rect.width
-
-def generate_random_clouds(num_clouds, cloud_images):
-    clouds = pygame.sprite.Group()
-    for _ in range(num_clouds):
-        x = random.randint(-SCREEN_WIDTH, SCREEN_WIDTH)
-        y = random.randint(0, SCREEN_HEIGHT // 2)
-        speed = random.uniform(0.5, 2)
-        image_path = random.choice(cloud_images)
-        cloud = Cloud(x, y, speed, image_path)
-        clouds.add(cloud)
-    return clouds
-
-def generate_platforms(platforms):
-    max_platforms = 10
-    platform_width = 100
-    platform_height = 20
-    min_distance = 50
-
-    existing_platforms = [(p.rect.x, p.rect.y, p.rect.width, p.rect.height) for p in platforms]
-
-    while len(platforms) < max_platforms:
-        x = random.randint(0, SCREEN_WIDTH - platform_width)
-        y = random.randint(-SCREEN_HEIGHT, SCREEN_HEIGHT // 3)
-
-        # Ensure initial platforms are within jumpable distance for the player
-        if len(existing_platforms) < 3:
-            y = SCREEN_HEIGHT - 60 - len(existing_platforms) * 50
-
-        # Check for overlap
-        overlapping = False
-        for px, py, pw, ph in existing_platforms:
-            if (x < px + pw and x + platform_width > px and y < py + ph and y + platform_height > py):
-                overlapping = True
-                break
+import time
+
+import game
+from resources import assets
+from game import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, CONTROL_KEYS, InputFrame, World
+from leveldata import load_level
+from profiler import NullProfiler, Profiler, ProfilerOverlay
+from rendering import DirtyRenderer, FullRenderer
+from replay import Recording
+from snapshot import restore, snapshot
+
+# Never run more than this many catch-up steps for one rendered frame
+MAX_STEPS_PER_FRAME = 5
+
+# How often the asyncio loop's background tasks run, in seconds
+PREFETCH_INTERVAL = 0.1
+TELEMETRY_INTERVAL = 5.0
+
+# The asyncio loop draws at most this many frames a second unless told otherwise
+DEFAULT_MAX_FPS = 2 * FPS
+
+def live_trace_path(profile):
+    # Where the asyncio loop keeps appending the trace while the game runs
+    return os.path.splitext(profile)[0] + '.live.jsonl'
+
+def setup(dirty=False, asset_cache=None, profile=None):
+    pygame.init()
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Ninjump")
+
+    # Images already scaled and converted on an earlier launch skip PNG decoding
+    if asset_cache:
+        assets.load_cache(asset_cache)
+
+    game.load_assets()
 
-        if not overlapping:
-            platform = Platform(x, y, platform_width, platform_height, 'grass')
-            platforms.add(platform)
-            all_sprites.add(platform)
-            existing_platforms.append((x, y, platform_width, platform_height))
+    # Load background image
+    background_image = assets.image('assets/background.png', (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
 
-def draw_score(score):
-    score_text = font.render(f"Score: {score}", True, (255, 255, 255))
-    screen.blit(score_text, (10, 10))
+    # Initialize font
+    font = assets.font(None, 36)
 
-def game_loop():
-    global platforms, all_sprites, projectiles
-    platforms = pygame.sprite.Group()
-    all_sprites = pygame.sprite.Group()
-    projectiles = pygame.sprite.Group()
+    # How many images were decoded against answered from memory or the cache file,
+    # only when profiling
+    if profile is not None:
+        print(assets.report())
 
-    platform1 = Platform(0, SCREEN_HEIGHT - 40, SCREEN_WIDTH, 40, 'grass')
-    platforms.add(platform1)
-    all_sprites.add(platform1)
+    renderer_class = DirtyRenderer if dirty else FullRenderer
+    renderer = renderer_class(screen, background_image, font)
 
-    cloud_images = ['assets/clouds/cloud_1.png', 'assets/clouds/cloud_2.png']
-    clouds = generate_random_clouds(10, cloud_images)
+    # profile is None when not profiling, '' to only show the overlay (F3 toggles it)
+    # or the CSV/JSON file the trace is written to on exit
+    profiler = NullProfiler() if profile is None else Profiler()
+    if profiler.enabled:
+        renderer.overlay = ProfilerOverlay(profiler, assets.font(None, 20))
+    return renderer, profiler
 
-    player = Player(platforms)
+def game_loop(dirty=False, asset_cache=None, profile=None, record=None, level=None):
+    renderer, profiler = setup(dirty, asset_cache, profile)
 
-    all_sprites.add(player)
-    all_sprites.add(clouds)
+    # Rewrite the cache when anything had to be decoded from PNG
+    if asset_cache and assets.decodes:
+        assets.save_cache(asset_cache)
 
-    generate_platforms(platforms)
+    world = World(profiler=profiler, level_data=load_level(level) if level else None)
+    player = world.player
+    recording = Recording(world.seed) if record else None
+    start = snapshot(world)  # Dying goes back to here, nothing is loaded again
 
     clock = pygame.time.Clock()
+    frame_time = 1000 / FPS
+    accumulator = frame_time
     running = True
+    pressed = []
+    shoot = False
 
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_w:
-                    player.jump()
-
-                if event.key == pygame.K_a:
-                    current_time = pygame.time.get_ticks()
-                    if current_time - player.last_key_time['left'] < player.double_tap_threshold:
-                        player.dash(-1)
-                    player.last_key_time['left'] = current_time
-
-                if event.key == pygame.K_d:
-                    current_time = pygame.time.get_ticks()
-                    if current_time - player.last_key_time['right'] < player.double_tap_threshold:
-                        player.dash(1)
-                    player.last_key_time['right'] = current_time
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left mouse button
-                    keys = pygame.key.get_pressed()
-                    direction = [0, 0]
-                    if keys[pygame.K_w]:
-                        direction[1] = -1
-                    if keys[pygame.K_s]:
-                        direction[1] = 1
-                    if keys[pygame.K_a]:
-                        direction[0] = -1
-                    if keys[pygame.K_d]:
-                        direction[0] = 1
-
-                    player.shoot(direction)
-
-        all_sprites.update()
-
-        screen.blit(background_image, (0, 0))
-        clouds.update()
-        clouds.draw(screen)
-        all_sprites.draw(screen)
-        draw_score(player.score)  # Draw the score
-
-        if player.dashing:
-            for ghost_image, position in player.ghost_trail:
-                screen.blit(ghost_image, position)
-
-        pygame.display.flip()
-        clock.tick(60)
+        profiler.begin_frame()
+        with profiler.phase('events'):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_F3 and renderer.overlay is not None:
+                        renderer.overlay.visible = not renderer.overlay.visible
+                    pressed.append(event.key)
+
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button == 1:  # Left mouse button
+                        shoot = True
+
+        # Step the world at the fixed rate however long the last frame took,
+        # input events wait for the next step and go to that step only
+        keys = pygame.key.get_pressed()
+        held = [key for key in CONTROL_KEYS if keys[key]]
+        steps = min(int(accumulator // frame_time), MAX_STEPS_PER_FRAME)
+        accumulator = min(accumulator - steps * frame_time, frame_time)
+        for _ in range(steps):
+            inputs = InputFrame(held, pressed, shoot)
+            if recording is not None:
+                recording.record(inputs)
+            world.step(inputs)
+            pressed = []
+            shoot = False
+            if player.dead:
+                print("Player has died")
+                if recording is not None:
+                    # Recordings end at the death, replays have no restarts
+                    running = False
+                else:
+                    restore(world, start)
+                break
+
+        with profiler.phase('draw'):
+            renderer.draw(world)
+        profiler.end_frame(world)
+        accumulator += clock.tick(FPS)
+
+    if profile:
+        profiler.export(profile)
+    if recording is not None:
+        recording.save(record, world)
+
+    pygame.quit()
+    sys.exit()
+
+class Interpolation:
+    # Moving sprites and the camera drawn part of the way between the last two steps, so
+    # rendering faster than the fixed step still shows smooth motion
+    def __init__(self, world):
+        self.world = world
+        self.previous = {}
+        self.camera_y = world.camera.y
+
+    def moving(self):
+        world = self.world
+        yield world.player
+        yield from world.projectiles
+        yield from world.enemies.near
+
+    def before_step(self):
+        self.previous = {sprite: sprite.rect.topleft for sprite in self.moving()}
+        self.camera_y = self.world.camera.y
+
+    def draw(self, renderer, alpha):
+        # Rects are moved back to where the last step left them right after drawing
+        world = self.world
+        current = []
+        for sprite, (x, y) in self.previous.items():
+            if sprite.alive():
+                rect = sprite.rect
+                current.append((rect, rect.x, rect.y))
+                rect.x = round(x + (rect.x - x) * alpha)
+                rect.y = round(y + (rect.y - y) * alpha)
+        camera_y = world.camera.y
+        world.camera.view.y = round(self.camera_y + (camera_y - self.camera_y) * alpha)
+        try:
+            renderer.draw(world)
+        finally:
+            world.camera.view.y = camera_y
+            for rect, x, y in current:
+                rect.x = x
+                rect.y = y
+
+async def async_game_loop(dirty=False, asset_cache=None, profile=None, record=None, max_fps=None, level=None):
+    # The same game as game_loop() as separate asyncio tasks: the fixed rate simulation
+    # (events and steps), rendering with interpolation up to max_fps frames a second,
+    # and background work (level chunks prefetched ahead of the camera,
+    # the asset cache and the profiler trace written on a worker thread). A slow frame
+    # or file write only delays drawing, the simulation keeps its own schedule.
+    renderer, profiler = setup(dirty, asset_cache, profile)
+    loop = asyncio.get_running_loop()
+    cache_saved = None
+    if asset_cache and assets.decodes:
+        cache_saved = loop.run_in_executor(None, assets.save_cache, asset_cache)
+
+    world = World(profiler=profiler, level_data=load_level(level) if level else None)
+    recording = Recording(world.seed) if record else None
+    start = snapshot(world)
+    interpolation = Interpolation(world)
+    step_time = 1 / FPS
+    last_step = time.perf_counter()
+    running = True
+    stopped = asyncio.Event()  # Set when the simulation ends so no background task holds up quitting
+
+    async def idle(seconds):
+        # Sleep for seconds or until the game ends, whichever comes first
+        try:
+            await asyncio.wait_for(stopped.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def simulate():
+        nonlocal last_step, running
+        pressed = []
+        shoot = False
+        next_step = time.perf_counter()
+        while running:
+            await asyncio.sleep(max(0.0, next_step - time.perf_counter()))
+            profiler.begin_frame()
+            with profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_F3 and renderer.overlay is not None:
+                            renderer.overlay.visible = not renderer.overlay.visible
+                        pressed.append(event.key)
+                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        shoot = True
+            keys = pygame.key.get_pressed()
+            held = [key for key in CONTROL_KEYS if keys[key]]
+
+            # Catch up on missed steps, but never more than MAX_STEPS_PER_FRAME at once
+            now = time.perf_counter()
+            steps = min(int((now - next_step) / step_time) + 1, MAX_STEPS_PER_FRAME)
+            next_step = max(next_step + steps * step_time, now - step_time)
+            for _ in range(steps):
+                inputs = InputFrame(held, pressed, shoot)
+                if recording is not None:
+                    recording.record(inputs)
+                interpolation.before_step()
+                world.step(inputs)
+                last_step = time.perf_counter()
+                pressed = []
+                shoot = False
+                if world.player.dead:
+                    print("Player has died")
+                    if recording is not None:
+                        running = False
+                    else:
+                        restore(world, start)
+                        interpolation.before_step()
+                    break
+            profiler.end_frame(world)
+        stopped.set()
+
+    async def render():
+        frame_time = 1 / (max_fps or DEFAULT_MAX_FPS)
+        next_frame = time.perf_counter()
+        while running:
+            now = time.perf_counter()
+            alpha = min(1.0, (now - last_step) / step_time)
+            with profiler.phase('draw'):
+                interpolation.draw(renderer, alpha)
+            # Always yield, the other tasks only run while this one waits
+            next_frame = max(next_frame + frame_time, now)
+            await asyncio.sleep(max(0.0, next_frame - time.perf_counter()))
+
+    async def prefetch():
+        # Lay out the chunks above the view before the camera gets there, generate_platforms()
+        # then finds them in the level generator's cache
+        level = world.level
+        while not stopped.is_set():
+            first = level.chunk_index(world.camera.view.top - level.chunk_height)
+            for index in (first - 1, first - 2):
+                level.layout(index)
+            await idle(PREFETCH_INTERVAL)
+
+    async def telemetry():
+        # Only the frames since the last flush are appended, so a flush costs the same
+        # however long the game has been running. The final export writes the whole trace,
+        # nothing is flushed once the game has ended.
+        flushed = 0
+        while profile:
+            await idle(TELEMETRY_INTERVAL)
+            if stopped.is_set():
+                break
+            rows = profiler.trace[flushed:]
+            flushed += len(rows)
+            await loop.run_in_executor(None, profiler.append, live_trace_path(profile), rows)
+
+    await asyncio.gather(simulate(), render(), prefetch(), telemetry())
+    if cache_saved is not None:
+        await cache_saved
+
+    if profile:
+        profiler.export(profile)
+        if os.path.exists(live_trace_path(profile)):
+            os.remove(live_trace_path(profile))  # The full trace is written, it is not needed
+    if recording is not None:
+        recording.save(record, world)
 
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    game_loop()
+    parser = argparse.ArgumentParser(description="Ninjump")
+    parser.add_argument('--dirty', action='store_true', help="only redraw the parts of the screen that changed")
+    parser.add_argument('--asset-cache', metavar='FILE', help="keep decoded images in FILE to start faster next time")
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='',
+                        help="show the frame time overlay (F3) and write a CSV or JSON trace to FILE on exit")
+    parser.add_argument('--record', metavar='FILE', help="record every input and the seed to FILE for replay.py")
+    parser.add_argument('--level', metavar='FILE', help="tuning and hand-made chunks from a level file (.json or compiled .njl)")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="run simulation, rendering and background work as separate asyncio tasks")
+    parser.add_argument('--max-fps', type=int, default=DEFAULT_MAX_FPS,
+                        help=f"with --async, draw at most this many frames a second (default {DEFAULT_MAX_FPS})")
+    args = parser.parse_args()
+    if args.record and args.level:
+        # Recordings only keep the seed, replay.py would play them on the default level
+        parser.error("--record can't be used with --level")
+    if args.use_async:
+        asyncio.run(async_game_loop(args.dirty, args.asset_cache, args.profile, args.record, args.max_fps, args.level))
+    else:
+        game_loop(args.dirty, args.asset_cache, args.profile, args.record, args.level)
@@ -0,0 +1,132 @@
+import random
+
+import pygame
+
+from profiler import counters
+from resources import assets, convert, image_paths
+from tiles import DECOR_DIR
+
+CLOUD_IMAGES = ['assets/clouds/cloud_1.png', 'assets/clouds/cloud_2.png']
+
+# Clear parts of the baked strips, no image uses this colour
+COLORKEY = (255, 0, 255)
+
+# Clouds per cloud layer and how fast each layer drifts right, in pixels per frame
+CLOUDS_PER_LAYER = 5
+CLOUD_DRIFTS = (0.5, 1.0)
+
+# Distant decorations: how many, how much they are scaled up, how far their colours are
+# blended into the sky and how fast they follow the camera compared to the level
+DECOR_COUNT = 12
+DECOR_SCALE = 2
+DECOR_HAZE = 0.55
+DECOR_RATE = 0.25
+
+class ParallaxLayer:
+    # Images composed once onto a strip that wraps along one axis (0 for x, 1 for y).
+    # The strip is moved by rate times the camera y plus drift pixels per frame, so a
+    # layer costs at most two blits however many images went into it. items keeps where
+    # each image sits on the strip for renderers that draw them one by one.
+    def __init__(self, size, items, rate=0.0, drift=0.0, axis=0, top=0, transparent=True):
+        self.size = size
+        self.items = items
+        self.rate = rate
+        self.drift = drift
+        self.axis = axis
+        self.top = top  # Screen position of the strip across the wrapping axis
+        self.length = size[axis]
+
+        strip = pygame.Surface(size)
+        counters['surfaces'] += 1
+        if transparent:
+            strip.fill(COLORKEY)
+        for image, position in items:
+            for x, y in self.wrapped(position, image.get_size()):
+                strip.blit(image, (x, y))
+        strip = convert(strip, alpha=False)
+        if transparent:
+            # The images' pixels are either clear or opaque, a run-length encoded colour
+            # key skips the clear parts of the strip much faster than per-pixel alpha
+            strip.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        self.strip = strip
+
+    @property
+    def moving(self):
+        return self.rate != 0 or self.drift != 0
+
+    def offset(self, camera_y, frame):
+        return int(self.drift * frame - self.rate * camera_y) % self.length
+
+    def wrapped(self, position, size):
+        # position and, for an image crossing the end of the strip, its copy at the start
+        positions = [position]
+        along = position[self.axis]
+        if along + size[self.axis] > self.length:
+            shifted = list(position)
+            shifted[self.axis] = along - self.length
+            positions.append(tuple(shifted))
+        return positions
+
+    def place(self, along):
+        return (along, self.top) if self.axis == 0 else (self.top, along)
+
+    def blits(self, camera_y, frame, screen_size):
+        offset = self.offset(camera_y, frame)
+        blits = []
+        if offset > 0:
+            blits.append((self.strip, self.place(offset - self.length)))
+        if offset < screen_size[self.axis]:
+            blits.append((self.strip, self.place(offset)))
+        return blits
+
+    def positions(self, camera_y, frame, screen_size):
+        # ((index, copy), image, screen position) of every item on screen, an item showing
+        # at both ends of the screen is listed twice
+        offset = self.offset(camera_y, frame)
+        visible = []
+        for index, (image, position) in enumerate(self.items):
+            size = image.get_size()
+            start = (position[self.axis] + offset) % self.length
+            for copy, along in enumerate((start, start - self.length)):
+                if along < screen_size[self.axis] and along + size[self.axis] > 0:
+                    screen_position = list(position)
+                    screen_position[self.axis] = along
+                    screen_position[1 - self.axis] += self.top
+                    visible.append(((index, copy), image, tuple(screen_position)))
+        return visible
+
+def cloud_layers(width, height, rng):
+    # Each layer is twice the screen wide so the same clouds are not all back at once
+    images = [assets.image(path) for path in CLOUD_IMAGES]
+    tallest = max(image.get_height() for image in images)
+    layers = []
+    for drift in CLOUD_DRIFTS:
+        items = [(image, (rng.randrange(width * 2), rng.randint(0, height // 2)))
+                 for image in (rng.choice(images) for _ in range(CLOUDS_PER_LAYER))]
+        layers.append(ParallaxLayer((width * 2, height // 2 + tallest), items, drift=drift))
+    return layers
+
+def decor_layer(width, height, rng, sky):
+    # Large decorations scaled up and hazed towards the sky colour, scrolling slower than
+    # the level
+    keep = round(255 * (1 - DECOR_HAZE))
+    haze = [round(channel * DECOR_HAZE) for channel in sky]
+    images = []
+    for path in image_paths(f'assets/{DECOR_DIR}'):
+        image = pygame.transform.scale_by(assets.image(path), DECOR_SCALE)
+        image.fill((keep, keep, keep), special_flags=pygame.BLEND_RGB_MULT)
+        image.fill(haze, special_flags=pygame.BLEND_RGB_ADD)
+        images.append(image)
+    items = [(image, (rng.randrange(width - image.get_width()), rng.randrange(height * 2)))
+             for image in (rng.choice(images) for _ in range(DECOR_COUNT))]
+    return ParallaxLayer((width, height * 2), items, rate=DECOR_RATE, axis=1)
+
+def build_layers(background, seed=0):
+    # Back to front: the background picture, distant decorations, then the two cloud
+    # layers. The clouds are the same for every world, they take no part in the game.
+    width, height = background.get_size()
+    rng = random.Random(f"{seed}:parallax")
+    layers = [ParallaxLayer((width, height), [(background, (0, 0))], transparent=False)]
+    layers.append(decor_layer(width, height, rng, pygame.transform.average_color(background)[:3]))
+    layers.extend(cloud_layers(width, height, rng))
+    return layers
@@ -0,0 +1,50 @@
+class Pool:
+    # Free list of reusable objects. acquire() hands back a released object reset with
+    # the given arguments, or builds a new one with factory(*args) when none is free.
+    # Objects need a reset(*args) method.
+    def __init__(self, factory):
+        self.factory = factory
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.factory(*args)
+
+    def release(self, obj):
+        self.free.append(obj)
+
+class RingBuffer:
+    # Fixed number of slots reused in a circle, once full the oldest entry is overwritten
+    def __init__(self, capacity):
+        self.slots = [None] * capacity
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # Oldest first
+        capacity = len(self.slots)
+        for i in range(self.count):
+            yield self.slots[(self.start + i) % capacity]
+
+    def append(self, entry):
+        capacity = len(self.slots)
+        if self.count < capacity:
+            self.slots[(self.start + self.count) % capacity] = entry
+            self.count += 1
+        else:
+            self.slots[self.start] = entry
+            self.start = (self.start + 1) % capacity
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
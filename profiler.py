@@ -0,0 +1,190 @@
+import csv
+import json
+import time
+from collections import Counter, deque
+
+import pygame
+
+# Game code bumps these where it allocates, e.g. counters['surfaces'] += 1. The profiler
+# reads and clears them once per frame.
+counters = Counter()
+
+# Upper edges of the frame time histogram buckets, in ms
+HISTOGRAM_EDGES = [1, 2, 4, 8, 16.7, 33.3, 66.7]
+
+class PhaseTimer:
+    # Reusable context manager adding the time spent inside it to one phase
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.totals[self.name] += (time.perf_counter() - self.start) * 1000
+
+class NullTimer:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+class NullProfiler:
+    # What World uses when nobody is profiling, every call does nothing
+    enabled = False
+    timer = NullTimer()
+
+    def phase(self, name):
+        return self.timer
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self, world=None):
+        pass
+
+class Profiler:
+    # Scoped per-phase timers, a rolling window of frame times for p50/p95/p99 and a
+    # histogram, and per-frame counters (collision tests, surfaces allocated, ...).
+    # Every frame is also kept as a row so the whole run can be exported and diffed.
+    #
+    #   with profiler.phase('draw'):
+    #       renderer.draw(world)
+    enabled = True
+
+    def __init__(self, window=600, keep_trace=True):
+        self.window = deque(maxlen=window)
+        self.phases = Counter()
+        self.timers = {}
+        self.frame_start = 0.0
+        self.frame = 0
+        self.collision_tests = 0
+        self.keep_trace = keep_trace
+        self.trace = []
+        self.phase_names = []
+        self.counter_names = []
+        self.last = {}  # Phases and counters of the last finished frame
+
+    def phase(self, name):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = PhaseTimer(self.phases, name)
+            self.phase_names.append(name)
+        return timer
+
+    def begin_frame(self):
+        if self.frame == 0:
+            counters.clear()  # Whatever loading allocated is not part of a frame
+            self.phases.clear()
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self, world=None):
+        total = (time.perf_counter() - self.frame_start) * 1000
+        self.window.append(total)
+
+        frame_counters = dict(counters)
+        counters.clear()
+        if world is not None:
+            tests = world.platforms.tests
+            frame_counters['collision_tests'] = tests - self.collision_tests
+            self.collision_tests = tests
+        for name in frame_counters:
+            if name not in self.counter_names:
+                self.counter_names.append(name)
+
+        # Phases timed between two frames (drawing in the asyncio loop) go to the next one
+        row = {'frame': self.frame, 'total_ms': total}
+        row.update(self.phases)
+        row.update(frame_counters)
+        self.phases.clear()
+        self.last = row
+        if self.keep_trace:
+            self.trace.append(row)
+        self.frame += 1
+
+    def percentiles(self):
+        times = sorted(self.window)
+        if not times:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        last = len(times) - 1
+        return {f'p{p}': times[min(last, int(last * p / 100 + 0.5))] for p in (50, 95, 99)}
+
+    def histogram(self):
+        buckets = [0] * (len(HISTOGRAM_EDGES) + 1)
+        for frame_time in self.window:
+            for i, edge in enumerate(HISTOGRAM_EDGES):
+                if frame_time <= edge:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[-1] += 1
+        return buckets
+
+    def summary(self):
+        frames = len(self.trace) or 1
+        summary = {'frames': self.frame}
+        summary.update(self.percentiles())
+        summary['phase_mean_ms'] = {name: sum(row.get(name, 0) for row in self.trace) / frames
+                                    for name in self.phase_names}
+        summary['counter_totals'] = {name: sum(row.get(name, 0) for row in self.trace)
+                                     for name in self.counter_names}
+        summary['histogram'] = dict(zip([f'<={edge}ms' for edge in HISTOGRAM_EDGES] + ['slower'], self.histogram()))
+        return summary
+
+    def append(self, path, rows):
+        # Rows added to a JSON lines file, one frame per line. Used to keep a trace on disk
+        # while a game runs without rewriting everything written so far.
+        with open(path, 'a') as trace_file:
+            trace_file.writelines(json.dumps(row) + '\n' for row in rows)
+
+    def export(self, path):
+        # .json gets the summary and every frame, anything else is written as CSV
+        if path.endswith('.json'):
+            with open(path, 'w') as trace_file:
+                json.dump({'summary': self.summary(), 'frames': self.trace}, trace_file, indent=1)
+            return
+        columns = ['frame', 'total_ms'] + self.phase_names + self.counter_names
+        with open(path, 'w', newline='') as trace_file:
+            writer = csv.DictWriter(trace_file, columns, restval=0)
+            writer.writeheader()
+            writer.writerows(self.trace)
+
+class ProfilerOverlay:
+    # Text panel with the frame time percentiles, the last frame's phases and counters.
+    # Re-rendered a few times a second rather than every frame.
+    def __init__(self, profiler, font, refresh=30):
+        self.profiler = profiler
+        self.font = font
+        self.refresh = refresh
+        self.image = None
+        self.age = refresh
+        self.visible = True
+
+    def update(self):
+        self.age += 1
+        if self.image is not None and self.age < self.refresh:
+            return self.image
+        self.age = 0
+
+        profiler = self.profiler
+        percentiles = profiler.percentiles()
+        lines = ["frame p50 {p50:.2f} p95 {p95:.2f} p99 {p99:.2f} ms".format(**percentiles)]
+        for name in profiler.phase_names:
+            lines.append(f"{name} {profiler.last.get(name, 0):.2f} ms")
+        for name in profiler.counter_names:
+            lines.append(f"{name} {profiler.last.get(name, 0)}")
+
+        rendered = [self.font.render(line, True, (255, 255, 0)) for line in lines]
+        width = max(line.get_width() for line in rendered) + 8
+        height = sum(line.get_height() for line in rendered) + 8
+        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.image.fill((0, 0, 0, 160))
+        y = 4
+        for line in rendered:
+            self.image.blit(line, (4, y))
+            y += line.get_height()
+        counters['surfaces'] += 1 + len(rendered)
+        return self.image
@@ -0,0 +1,134 @@
+import pygame
+
+from hud import Hud
+from parallax import build_layers
+
+# Draw order, lowest first, moving parallax layers go below 0 back to front
+DECOR_LAYER = 1
+PLATFORM_LAYER = 2
+ENEMY_LAYER = 3
+PROJECTILE_LAYER = 4
+GHOST_LAYER = 5
+PLAYER_LAYER = 6
+HUD_LAYER = 7
+
+# Below the score
+OVERLAY_POSITION = (10, 40)
+
+class FullRenderer:
+    # Redraws the whole screen every frame and flips it
+    def __init__(self, screen, background, font):
+        self.screen = screen
+        self.layers = build_layers(background)
+        self.hud = Hud(font, screen.get_width())
+        self.overlay = None  # profiler.ProfilerOverlay, drawn on top when visible
+
+    def draw(self, world):
+        screen = self.screen
+        camera = world.camera
+        player = world.player
+
+        # Background, distant decorations and clouds are one or two blits of a baked strip
+        # each, the rest is drawn through the camera
+        size = screen.get_size()
+        for layer in self.layers:
+            screen.blits(layer.blits(camera.y, world.frame, size), doreturn=False)
+        camera.draw(screen, [decor for decor in world.decor if camera.is_visible(decor.rect)])
+        camera.draw(screen, world.platforms.visible(camera.view))
+        camera.draw(screen, [enemy for enemy in world.enemies if camera.is_visible(enemy.rect)])
+        camera.draw(screen, world.projectiles)
+
+        if player.dashing:
+            for ghost_image, position in player.ghost_trail:
+                screen.blit(ghost_image, camera.to_screen(position))
+
+        camera.draw(screen, [player])
+        self.hud.draw(screen, player)
+
+        if self.overlay is not None and self.overlay.visible:
+            screen.blit(self.overlay.update(), OVERLAY_POSITION)
+
+        pygame.display.flip()
+
+class ScreenSprite(pygame.sprite.DirtySprite):
+    # Screen space stand-in for a world sprite, only marked dirty when its image or
+    # on-screen position actually changed
+    def __init__(self, layer):
+        super().__init__()
+        self._layer = layer
+        self.image = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+
+    def sync(self, image, x, y, changed=False):
+        # changed is for an image redrawn in place, the same object with new pixels
+        if changed or image is not self.image or x != self.rect.x or y != self.rect.y:
+            self.image = image
+            self.rect = image.get_rect(topleft=(x, y))
+            self.dirty = 1
+
+class DirtyRenderer:
+    # Opt-in renderer that repaints and pushes to the display only the regions that
+    # changed since the last frame, using LayeredDirty over the background. Worth it on
+    # software rendering while the camera is still; a scrolling frame touches every
+    # visible sprite and costs about the same as a full redraw. Still parallax layers
+    # become the background, moving ones show their images one by one so only what
+    # moved is repainted rather than their whole strips.
+    def __init__(self, screen, background, font):
+        self.screen = screen
+        layers = build_layers(background)
+        self.layers = [layer for layer in layers if layer.moving]
+        background = background.copy()
+        for layer in layers:
+            if not layer.moving:
+                background.blits(layer.blits(0, 0, screen.get_size()), doreturn=False)
+        self.sprites = pygame.sprite.LayeredDirty()
+        self.sprites.clear(screen, background)
+        self.proxies = {}
+        self.hud = Hud(font, screen.get_width())
+        self.overlay = None  # profiler.ProfilerOverlay, drawn on top when visible
+
+        screen.blit(background, (0, 0))
+        pygame.display.flip()
+
+    def show(self, key, layer, image, x, y, seen, changed=False):
+        proxy = self.proxies.get(key)
+        if proxy is None:
+            proxy = self.proxies[key] = ScreenSprite(layer)
+            self.sprites.add(proxy)
+        proxy.sync(image, x, y, changed)
+        seen.add(key)
+
+    def draw(self, world):
+        camera = world.camera
+        player = world.player
+        offset_x, offset_y = camera.view.topleft
+        seen = set()
+
+        size = self.screen.get_size()
+        for i, layer in enumerate(self.layers):
+            for key, image, (x, y) in layer.positions(camera.y, world.frame, size):
+                self.show(('parallax', i, key), i - len(self.layers), image, x, y, seen)
+        for decor in world.decor:
+            if camera.is_visible(decor.rect):
+                self.show(decor, DECOR_LAYER, decor.image, decor.rect.x - offset_x, decor.rect.y - offset_y, seen)
+        for platform in world.platforms.visible(camera.view):
+            self.show(platform, PLATFORM_LAYER, platform.image, platform.rect.x - offset_x, platform.rect.y - offset_y, seen)
+        for enemy in world.enemies:
+            if camera.is_visible(enemy.rect):
+                self.show(enemy, ENEMY_LAYER, enemy.image, enemy.rect.x - offset_x, enemy.rect.y - offset_y, seen)
+        for projectile in world.projectiles:
+            self.show(projectile, PROJECTILE_LAYER, projectile.image, projectile.rect.x - offset_x, projectile.rect.y - offset_y, seen)
+        if player.dashing:
+            for i, (ghost_image, (x, y)) in enumerate(player.ghost_trail):
+                self.show(('ghost', i), GHOST_LAYER, ghost_image, x - offset_x, y - offset_y, seen)
+        self.show(player, PLAYER_LAYER, player.image, player.rect.x - offset_x, player.rect.y - offset_y, seen)
+        for i, (image, (x, y), changed) in enumerate(self.hud.items(player)):
+            self.show(('hud', i), HUD_LAYER, image, x, y, seen, changed)
+        if self.overlay is not None and self.overlay.visible:
+            self.show(self.overlay, HUD_LAYER, self.overlay.update(), *OVERLAY_POSITION, seen)
+
+        # Removed proxies leave their old rect behind for LayeredDirty to repaint
+        for key in [key for key in self.proxies if key not in seen]:
+            self.proxies.pop(key).kill()
+
+        pygame.display.update(self.sprites.draw(self.screen))
@@ -0,0 +1,124 @@
+import argparse
+import struct
+import zlib
+
+import game
+from audio import audio
+from game import CONTROL_KEYS, InputFrame, World
+from profiler import Profiler
+from simulation import run
+
+# Input recordings: the world seed and every step's InputFrame, so a session can be
+# played back headless, as fast as possible, and always produce the same frames.
+#
+# File layout: header (magic, version, seed, frame count), then run-length encoded
+# records (repeat count, flags byte, pressed keys) and a footer with a checksum of the
+# world state at the end of the recording, used to spot replays that went out of sync.
+#
+#   python replay.py benchmarks/replays/*.njr
+
+REPLAY_MAGIC = b'NJRP'
+REPLAY_VERSION = 1
+HEADER = struct.Struct('<4sHQI')
+RECORD = struct.Struct('<HBB')
+FOOTER = struct.Struct('<I')
+
+# Flags byte: one bit per held control key, then the shoot click
+SHOOT_BIT = 1 << len(CONTROL_KEYS)
+
+def world_checksum(world):
+    player = world.player
+    state = struct.pack('<qiiddiiiq', world.frame, player.rect.x, player.rect.y, player.change_x,
+                        player.change_y, player.score, player.health, len(world.platforms), world.camera.y)
+    return zlib.crc32(state)
+
+def encode(inputs):
+    flags = 0
+    for bit, key in enumerate(CONTROL_KEYS):
+        if inputs[key]:
+            flags |= 1 << bit
+    if inputs.shoot:
+        flags |= SHOOT_BIT
+    # Keys the game logic ignores are not kept
+    pressed = bytes(CONTROL_KEYS.index(key) for key in inputs.pressed if key in CONTROL_KEYS)
+    return flags, pressed
+
+def decode(flags, pressed):
+    held = [key for bit, key in enumerate(CONTROL_KEYS) if flags & (1 << bit)]
+    return InputFrame(held, [CONTROL_KEYS[index] for index in pressed], bool(flags & SHOOT_BIT))
+
+class Recording:
+    def __init__(self, seed, frames=None, checksum=None):
+        self.seed = seed
+        self.frames = frames if frames is not None else []
+        self.checksum = checksum
+
+    def __len__(self):
+        return len(self.frames)
+
+    def record(self, inputs):
+        self.frames.append(inputs)
+
+    def save(self, path, world=None):
+        records = []
+        previous = None
+        for inputs in self.frames:
+            encoded = encode(inputs)
+            if encoded == previous and records[-1][0] < 0xFFFF:
+                records[-1][0] += 1
+            else:
+                records.append([1, encoded])
+                previous = encoded
+
+        chunks = [HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, len(self.frames))]
+        for repeat, (flags, pressed) in records:
+            chunks.append(RECORD.pack(repeat, flags, len(pressed)))
+            chunks.append(pressed)
+        checksum = world_checksum(world) if world is not None else 0
+        chunks.append(FOOTER.pack(checksum))
+        with open(path, 'wb') as replay_file:
+            replay_file.write(b''.join(chunks))
+
+def load(path):
+    with open(path, 'rb') as replay_file:
+        data = replay_file.read()
+    magic, version, seed, count = HEADER.unpack_from(data, 0)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+
+    offset = HEADER.size
+    frames = []
+    while len(frames) < count:
+        repeat, flags, pressed_count = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        inputs = decode(flags, data[offset:offset + pressed_count])
+        offset += pressed_count
+        # InputFrames are never changed once made, repeats can share one
+        frames.extend([inputs] * repeat)
+    checksum, = FOOTER.unpack_from(data, offset)
+    return Recording(seed, frames, checksum or None)
+
+def replay(recording, profiler=None):
+    # Play every recorded frame headless, the player dying does not end a replay
+    world = World(recording.seed, profiler)
+    result = run(world, recording.frames, stop_on_death=False, seed=recording.seed)
+    result.in_sync = recording.checksum is None or recording.checksum == world_checksum(world)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Play input recordings back headless and time them")
+    parser.add_argument('replays', nargs='+')
+    args = parser.parse_args()
+
+    game.load_assets()
+    print(f"{'replay':<40} {'frames':>7} {'fps':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}  sync")
+    for path in args.replays:
+        profiler = Profiler(window=1 << 20, keep_trace=False)
+        result = replay(load(path), profiler)
+        percentiles = profiler.percentiles()
+        print(f"{path:<40} {result.frames:>7} {result.fps:>8.0f} {percentiles['p50']:>7.3f} "
+              f"{percentiles['p95']:>7.3f} {percentiles['p99']:>7.3f}  {'ok' if result.in_sync else 'DESYNC'}")
+    print(audio.report())
+
+if __name__ == "__main__":
+    main()
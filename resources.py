@@ -0,0 +1,189 @@
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+# Packed cache file: magic, version, entry count, then per entry the image key
+# (path, scaled size, alpha), the source file's mtime and the raw RGBA pixels
+CACHE_MAGIC = b'NJAC'
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct('<4sHI')
+CACHE_ENTRY = struct.Struct('<HHHBqII')
+
+class SilentSound:
+    # Stand-in for pygame.mixer.Sound when the mixer is not initialised (headless runs)
+    def play(self):
+        pass
+
+def convert_alpha(surface):
+    # convert_alpha() needs a video mode, headless runs keep the surface as it is
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha()
+
+def convert(surface, alpha=True):
+    if alpha:
+        return convert_alpha(surface)
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert()
+
+def image_paths(root='assets'):
+    paths = []
+    for directory, _, names in os.walk(root):
+        paths.extend(os.path.join(directory, name).replace(os.sep, '/') for name in names if name.endswith('.png'))
+    return sorted(paths)
+
+class AssetManager:
+    # Loads every image, sound and font once per path and hands out the same object to
+    # everyone who asks for it. preload() decodes images on a thread pool so startup can
+    # go on while they load; converting to the display format stays on the main thread.
+    # With a cache file, images are stored already scaled as raw pixels and later
+    # launches skip PNG decoding. There are no lazy handles: every image is preloaded
+    # at startup, so a handle would have nothing left to defer, and callers keep the
+    # surface itself.
+    def __init__(self, workers=4):
+        self.workers = workers
+        self.executor = None
+        self.pending = {}  # path -> Future of the decoded surface
+        self.decoded = {}  # path -> decoded surface, before scaling and conversion
+        self.packed = {}  # image key -> surface read from the cache file
+        self.packed_paths = set()
+        self.images = {}  # image key -> surface ready to blit
+        self.sounds = {}
+        self.fonts = {}
+        self.decodes = 0  # PNG files actually decoded
+        self.requests = 0  # Image requests, most are answered from self.images
+
+    def preload(self, paths):
+        for path in paths:
+            if path in self.pending or path in self.decoded:
+                continue
+            if path in self.packed_paths:
+                continue
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers)
+            self.pending[path] = self.executor.submit(pygame.image.load, path)
+
+    def wait(self):
+        for path in list(self.pending):
+            self.decode(path)
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def decode(self, path):
+        surface = self.decoded.get(path)
+        if surface is None:
+            future = self.pending.pop(path, None)
+            surface = future.result() if future is not None else pygame.image.load(path)
+            self.decoded[path] = surface
+            self.decodes += 1
+        return surface
+
+    def image(self, path, size=None, alpha=True):
+        self.requests += 1
+        key = (path, size, alpha)
+        surface = self.images.get(key)
+        if surface is None:
+            surface = self.packed.pop(key, None)
+            if surface is None:
+                surface = self.decode(path)
+                if size is not None:
+                    surface = pygame.transform.scale(surface, size)
+            surface = convert(surface, alpha)
+            self.images[key] = surface
+        return surface
+
+    def sound(self, path):
+        sound = self.sounds.get(path)
+        if sound is None:
+            if pygame.mixer.get_init() is None:
+                sound = SilentSound()
+            else:
+                sound = pygame.mixer.Sound(path)
+            self.sounds[path] = sound
+        return sound
+
+    def font(self, name, size):
+        font = self.fonts.get((name, size))
+        if font is None:
+            font = self.fonts[(name, size)] = pygame.font.Font(name, size)
+        return font
+
+    def load_cache(self, cache_path):
+        # Returns how many images came from the cache, entries whose source file
+        # changed since the cache was written are skipped
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                data = cache_file.read()
+        except OSError:
+            return 0
+        # An empty, cut short or foreign file is a cache miss, the images get decoded
+        try:
+            packed = self.unpack_cache(data)
+        except (struct.error, ValueError):
+            return 0
+        self.packed.update(packed)
+        self.packed_paths.update(path for path, _, _ in packed)
+        return len(packed)
+
+    def unpack_cache(self, data):
+        magic, version, count = CACHE_HEADER.unpack_from(data, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            return {}
+
+        offset = CACHE_HEADER.size
+        packed = {}
+        view = memoryview(data)
+        for _ in range(count):
+            path_length, size_w, size_h, alpha, mtime, width, height = CACHE_ENTRY.unpack_from(data, offset)
+            offset += CACHE_ENTRY.size
+            end = offset + path_length + width * height * 4
+            if end > len(data):
+                raise ValueError("cache entry runs past the end of the file")
+            path = bytes(view[offset:offset + path_length]).decode('utf-8')
+            offset += path_length
+            pixels = view[offset:end]
+            offset = end
+
+            try:
+                fresh = os.stat(path).st_mtime_ns == mtime
+            except OSError:
+                fresh = False
+            if fresh:
+                size = (size_w, size_h) if size_w else None
+                packed[(path, size, bool(alpha))] = pygame.image.frombytes(bytes(pixels), (width, height), 'RGBA')
+        return packed
+
+    def save_cache(self, cache_path):
+        # Everything ready to blit, plus images that were preloaded but never asked for
+        entries = dict(self.images)
+        used = {path for path, _, _ in self.images}
+        for path, surface in self.decoded.items():
+            if path not in used:
+                entries[(path, None, True)] = surface
+
+        chunks = [CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(entries))]
+        for (path, size, alpha), surface in entries.items():
+            encoded = path.encode('utf-8')
+            size_w, size_h = size if size is not None else (0, 0)
+            width, height = surface.get_size()
+            mtime = os.stat(path).st_mtime_ns
+            chunks.append(CACHE_ENTRY.pack(len(encoded), size_w, size_h, alpha, mtime, width, height))
+            chunks.append(encoded)
+            chunks.append(pygame.image.tobytes(surface, 'RGBA'))
+        # Written next to the cache and moved over it, a write cut short never leaves a
+        # broken cache behind
+        temporary_path = cache_path + '.tmp'
+        with open(temporary_path, 'wb') as cache_file:
+            cache_file.write(b''.join(chunks))
+        os.replace(temporary_path, cache_path)
+
+    def report(self):
+        return (f"assets: {len(self.images)} images from {self.requests} requests, "
+                f"{self.decodes} PNG decodes, {len(self.sounds)} sounds")
+
+# Shared by the whole game
+assets = AssetManager()
@@ -0,0 +1,123 @@
+import argparse
+import csv
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import game
+from resources import assets
+from game import World
+from simulation import idle_inputs, random_inputs, run
+
+# Runs many seeded headless sessions in parallel, one worker process per core, for level
+# difficulty sweeps and bot evaluation. Every worker loads the assets once and keeps them
+# for all the seeds it is given; results stream back as batches finish and are folded
+# into one report.
+#
+#   python runner.py --seeds 1000 --frames 10000
+#   python runner.py --seeds 0:200 --workers 4 --csv results.csv
+
+def init_worker(asset_cache=None):
+    # Runs once per worker process, every seed after the first finds the assets loaded
+    if asset_cache:
+        assets.load_cache(asset_cache)
+    game.load_assets()
+
+def run_seeds(seeds, frames, idle):
+    # Not simulate(), that loads the assets again and would start every seed with
+    # cold platform surface caches
+    results = []
+    for seed in seeds:
+        inputs = idle_inputs() if idle else random_inputs(seed)
+        results.append(run(World(seed), inputs, frames, seed=seed))
+    return results
+
+def batches(seeds, size):
+    for i in range(0, len(seeds), size):
+        yield seeds[i:i + size]
+
+def run_all(seeds, frames=10000, idle=False, workers=None, asset_cache=None, batch_size=None):
+    # Yields SimulationResults as they come in, in no particular order. workers=0 runs
+    # everything in this process.
+    if workers == 0:
+        init_worker(asset_cache)
+        for seed in seeds:
+            yield from run_seeds([seed], frames, idle)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    if batch_size is None:
+        # A few batches per worker keeps them all busy to the end without a round trip
+        # per seed
+        batch_size = max(1, len(seeds) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(asset_cache,)) as executor:
+        futures = [executor.submit(run_seeds, batch, frames, idle) for batch in batches(seeds, batch_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+class Report:
+    def __init__(self):
+        self.results = []
+
+    def add(self, result):
+        self.results.append(result)
+
+    def summary(self, elapsed):
+        results = self.results
+        if not results:
+            return f"runs 0, nothing to summarize ({elapsed:.2f}s)"
+        scores = [result.score for result in results]
+        deaths = [result.frames for result in results if result.died]
+        frames = sum(result.frames for result in results)
+        lines = [
+            f"runs {len(results)}, died {len(deaths)} ({len(deaths) / len(results):.1%})",
+            f"score mean {statistics.mean(scores):.1f}, median {statistics.median(scores)}, "
+            f"min {min(scores)}, max {max(scores)}",
+        ]
+        if deaths:
+            lines.append(f"death frame median {statistics.median(deaths)}, min {min(deaths)}, max {max(deaths)}")
+        lines.append(f"{frames} frames in {elapsed:.2f}s, {frames / elapsed:.0f} frames/s total, "
+                     f"{statistics.mean(result.fps for result in results):.0f} frames/s per run")
+        return '\n'.join(lines)
+
+    def export(self, path):
+        with open(path, 'w', newline='') as results_file:
+            writer = csv.writer(results_file)
+            writer.writerow(['seed', 'frames', 'score', 'died', 'death_frame', 'fps'])
+            for result in sorted(self.results, key=lambda result: result.seed):
+                writer.writerow([result.seed, result.frames, result.score, int(result.died),
+                                 result.frames if result.died else '', f"{result.fps:.0f}"])
+
+def parse_seeds(text):
+    # "100" is seeds 0 to 99, "100:200" is seeds 100 to 199
+    if ':' in text:
+        start, stop = text.split(':')
+        return list(range(int(start), int(stop)))
+    return list(range(int(text)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seeded headless sessions on every core")
+    parser.add_argument('--seeds', type=parse_seeds, default=parse_seeds('100'), help="N or START:STOP")
+    parser.add_argument('--frames', type=int, default=10000)
+    parser.add_argument('--idle', action='store_true', help="feed no input instead of the random bot")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes, default one per core, 0 runs inline")
+    parser.add_argument('--asset-cache', metavar='FILE', help="packed asset cache the workers load images from")
+    parser.add_argument('--csv', metavar='FILE', help="write one row per seed to FILE")
+    parser.add_argument('--verbose', action='store_true', help="print every run as it finishes")
+    args = parser.parse_args()
+
+    report = Report()
+    start = time.perf_counter()
+    for result in run_all(args.seeds, args.frames, args.idle, args.workers, args.asset_cache):
+        report.add(result)
+        if args.verbose:
+            print(result)
+    elapsed = time.perf_counter() - start
+
+    print(report.summary(elapsed))
+    if args.csv:
+        report.export(args.csv)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import argparse
+import random
+import time
+
+import pygame
+
+import game
+from audio import audio
+from game import InputFrame, World
+from leveldata import load_level
+from profiler import Profiler
+from resources import assets
+
+# Headless runner: steps a World as fast as possible from an input stream, no window,
+# no mixer and no wall clock. Used for bots, regression runs and load tests.
+#
+#   python simulation.py --seed 1 --frames 100000
+
+class SimulationResult:
+    def __init__(self, seed, frames, score, died, elapsed):
+        self.seed = seed
+        self.frames = frames
+        self.score = score
+        self.died = died
+        self.elapsed = elapsed
+
+    @property
+    def fps(self):
+        return self.frames / self.elapsed if self.elapsed > 0 else float('inf')
+
+    def __repr__(self):
+        return (f"SimulationResult(seed={self.seed}, frames={self.frames}, score={self.score}, "
+                f"died={self.died}, fps={self.fps:.0f})")
+
+def idle_inputs():
+    while True:
+        yield InputFrame()
+
+def random_inputs(seed=None):
+    # A simple bot: holds a direction for a while, jumps, dashes and shoots at random
+    rng = random.Random(seed)
+    held = ()
+    while True:
+        if rng.random() < 0.05:
+            held = rng.choice([(), (pygame.K_a,), (pygame.K_d,), (pygame.K_w, pygame.K_d), (pygame.K_w, pygame.K_a)])
+        pressed = []
+        if rng.random() < 0.08:
+            pressed.append(pygame.K_w)
+        if rng.random() < 0.01:
+            # Double tap, the second press lands on the next frame
+            key = rng.choice([pygame.K_a, pygame.K_d])
+            yield InputFrame(held, [key])
+            pressed.append(key)
+        yield InputFrame(held, pressed, rng.random() < 0.02)
+
+def run(world, inputs, max_frames=None, stop_on_death=True, seed=None):
+    # Step the world once per InputFrame until the stream ends, max_frames is
+    # reached or the player dies
+    start_frame = world.frame
+    profiler = world.profiler
+    start = time.perf_counter()
+    for inputs_frame in inputs:
+        if max_frames is not None and world.frame - start_frame >= max_frames:
+            break
+        profiler.begin_frame()
+        world.step(inputs_frame)
+        profiler.end_frame(world)
+        if stop_on_death and world.player.dead:
+            break
+    elapsed = time.perf_counter() - start
+    return SimulationResult(seed, world.frame - start_frame, world.player.score, world.player.dead, elapsed)
+
+def simulate(seed=None, max_frames=10000, inputs=None, profiler=None, level_data=None):
+    game.load_assets()
+    world = World(seed, profiler, level_data)
+    if inputs is None:
+        inputs = random_inputs(seed)
+    return run(world, inputs, max_frames, seed=seed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game logic headless")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--frames', type=int, default=10000)
+    parser.add_argument('--idle', action='store_true', help="feed no input instead of the random bot")
+    parser.add_argument('--profile', metavar='FILE', help="write a per-frame CSV or JSON trace to FILE")
+    parser.add_argument('--level', metavar='FILE', help="tuning and hand-made chunks from a level file")
+    args = parser.parse_args()
+
+    inputs = idle_inputs() if args.idle else None
+    profiler = Profiler() if args.profile else None
+    level_data = load_level(args.level) if args.level else None
+    # Same as simulate(), keeping the world for its level generator's report
+    game.load_assets()
+    world = World(args.seed, profiler, level_data)
+    print(run(world, inputs or random_inputs(args.seed), args.frames, seed=args.seed))
+    print(world.level.report())
+    print(game.platform_surfaces.report())
+    print(assets.report())
+    print(audio.report())
+    if profiler is not None:
+        profiler.export(args.profile)
+        print("frame time p50 {p50:.3f} p95 {p95:.3f} p99 {p99:.3f} ms".format(**profiler.percentiles()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import struct
+
+from enemies import ENEMY_STATE, Enemy
+from game import PLAYER_STATE, InputFrame, build_chunk
+
+# Whole-world snapshots packed into one bytes buffer, for restarting after a death,
+# rewinding, checkpointing long sessions and bisecting simulation bugs. Nothing is
+# loaded again on restore: platforms are rebuilt from the level generator (the seed and
+# chunk indexes are enough), the rest is copied back onto the world's own objects.
+#
+#   start = snapshot(world)
+#   ...
+#   restore(world, start)
+
+SNAPSHOT_MAGIC = b'NJSS'
+SNAPSHOT_VERSION = 3
+# Magic, version, seed, frame, camera y, scroll speed
+HEADER = struct.Struct('<4sHQqii')
+COUNT = struct.Struct('<I')
+CHUNK = struct.Struct('<i')
+# Chunk index, level of detail bucket and place in the near list (-1 when far)
+ENEMY = struct.Struct('<iBi')
+ENEMY_SCHEDULE = struct.Struct('<QB')
+PROJECTILE = struct.Struct('<iibb')
+
+def snapshot(world):
+    chunks = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, world.seed, world.frame, world.camera.y,
+                          world.scroll_speed)]
+    chunks.append(world.player.pack_state())
+
+    chunks.append(COUNT.pack(len(world.chunks)))
+    chunks.extend(CHUNK.pack(index) for index in world.chunks)
+
+    group = world.enemies
+    near = {enemy: i for i, enemy in enumerate(group.near)}
+    enemies = [(index, enemy) for index, spawned in world.chunk_enemies.items() for enemy in spawned
+               if enemy.alive()]
+    # Group order, which is the order the enemies are updated in
+    order = {enemy: i for i, enemy in enumerate(group)}
+    enemies.sort(key=lambda entry: order[entry[1]])
+    chunks.append(ENEMY_SCHEDULE.pack(group.frame, group.next_bucket))
+    chunks.append(COUNT.pack(len(enemies)))
+    for index, enemy in enemies:
+        chunks.append(ENEMY.pack(index, group.bucket_of[enemy], near.get(enemy, -1)))
+        chunks.append(enemy.pack_state())
+
+    chunks.append(COUNT.pack(len(world.projectiles)))
+    for projectile in world.projectiles:
+        chunks.append(PROJECTILE.pack(projectile.rect.x, projectile.rect.y, *projectile.direction))
+
+    return b''.join(chunks)
+
+def restore(world, data):
+    magic, version, seed, frame, camera_y, scroll_speed = HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"not a version {SNAPSHOT_VERSION} world snapshot")
+    if seed != world.seed:
+        raise ValueError(f"snapshot of seed {seed} can't be restored into a world with seed {world.seed}")
+    offset = HEADER.size
+
+    world.frame = frame
+    world.camera.view.y = camera_y
+    world.scroll_speed = scroll_speed
+    world.keys = InputFrame()
+
+    world.player.unpack_state(data[offset:offset + PLAYER_STATE.size])
+    offset += PLAYER_STATE.size
+
+    # Platforms are rebuilt in the saved chunk order so collision queries see them in
+    # the same order as the world the snapshot was taken from
+    for sprite in world.platforms.sprites() + world.decor.sprites():
+        sprite.kill()
+    world.chunks.clear()
+    count, = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        index, = CHUNK.unpack_from(data, offset)
+        offset += CHUNK.size
+        world.chunks[index] = build_chunk(world, world.level.layout(index))
+
+    group = world.enemies
+    group.empty()
+    world.chunk_enemies = {index: [] for index in world.chunks}
+    group.frame, next_bucket = ENEMY_SCHEDULE.unpack_from(data, offset)
+    offset += ENEMY_SCHEDULE.size
+    count, = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    near = []
+    for _ in range(count):
+        index, bucket, near_place = ENEMY.unpack_from(data, offset)
+        offset += ENEMY.size
+        enemy = Enemy(0, 0, world.platforms, world.player, world.get_ticks)
+        enemy.unpack_state(data[offset:offset + ENEMY_STATE.size])
+        offset += ENEMY_STATE.size
+        group.next_bucket = bucket
+        group.add(enemy)
+        world.chunk_enemies[index].append(enemy)
+        if near_place >= 0:
+            near.append((near_place, enemy))
+    group.next_bucket = next_bucket
+    group.near = {enemy: None for _, enemy in sorted(near, key=lambda entry: entry[0])}
+
+    for projectile in world.projectiles.sprites():
+        projectile.kill()
+    count, = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    for _ in range(count):
+        x, y, dx, dy = PROJECTILE.unpack_from(data, offset)
+        offset += PROJECTILE.size
+        projectile = world.projectile_pool.acquire(0, 0, [dx, dy], world.camera)
+        projectile.rect.topleft = (x, y)
+        world.projectiles.add(projectile)
+
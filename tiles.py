@@ -0,0 +1,84 @@
+import os
+
+import pygame
+
+from profiler import counters
+from resources import assets, convert_alpha
+
+TILE_SIZE = 16
+TILE_DIRS = ['grass', 'stone']
+
+# Which tile each platform block type is built from
+BLOCK_TILES = {
+    'grass': ('grass', 1),
+    'stone': ('stone', 1),
+    'dirt': ('grass', 5),
+}
+
+# Decorations are whole images drawn behind the platforms, block types like 'large_decor/2'
+DECOR_DIR = 'large_decor'
+
+def is_decor(block_type):
+    return block_type.startswith(DECOR_DIR + '/')
+
+class TileAtlas:
+    # Every tile of the tile directories, loaded and scaled to TILE_SIZE once
+    def __init__(self, root='assets', tile_dirs=TILE_DIRS, tile_size=TILE_SIZE):
+        self.tile_size = tile_size
+        self.tiles = {}
+        for kind in tile_dirs:
+            directory = os.path.join(root, kind)
+            for name in sorted(os.listdir(directory)):
+                variant, extension = os.path.splitext(name)
+                if extension != '.png':
+                    continue
+                path = f'{root}/{kind}/{name}'
+                self.tiles[(kind, int(variant))] = assets.image(path, (tile_size, tile_size))
+
+    def get(self, kind, variant):
+        return self.tiles[(kind, variant)]
+
+    def block(self, block_type):
+        return self.tiles[BLOCK_TILES[block_type]]
+
+class PlatformSurfaceCache:
+    # Baked platform images keyed by (block_type, width, height). Platforms of the same
+    # type and size share one surface, so they must never draw onto their image.
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.surfaces = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0  # What the hits would have cost with one surface per platform
+
+    def get(self, block_type, width, height):
+        key = (block_type, width, height)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.bytes_saved += surface.get_bytesize() * width * height
+            return surface
+
+        self.misses += 1
+        counters['surfaces'] += 1
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        block_image = self.atlas.block(block_type)
+        size = self.atlas.tile_size
+        for i in range(0, width, size):
+            for j in range(0, height, size):
+                surface.blit(block_image, (i, j))
+        surface = convert_alpha(surface)
+        self.surfaces[key] = surface
+        return surface
+
+    def hit_rate(self):
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def memory_used(self):
+        return sum(surface.get_bytesize() * surface.get_width() * surface.get_height()
+                   for surface in self.surfaces.values())
+
+    def report(self):
+        return (f"platform surfaces: {len(self.surfaces)} baked, {self.hits} hits, {self.misses} misses, "
+                f"hit rate {self.hit_rate():.1%}, {self.memory_used() / 1024:.0f} KiB used, {self.bytes_saved / 1024:.0f} KiB saved")